@@ -1,53 +1,311 @@
 import socket
+import re
+import ctypes
+import struct
+import sys
+import selectors
+import errno
 from time import sleep
 from datetime import datetime as dt
 import os
-from queue import Queue
+
+
+# sendmmsg(2) lets a whole batch of upload packets go out in a single syscall on linux
+class _iovec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+class _msghdr(ctypes.Structure):
+    _fields_ = [("msg_name", ctypes.c_void_p), ("msg_namelen", ctypes.c_uint32),
+                ("msg_iov", ctypes.POINTER(_iovec)), ("msg_iovlen", ctypes.c_size_t),
+                ("msg_control", ctypes.c_void_p), ("msg_controllen", ctypes.c_size_t),
+                ("msg_flags", ctypes.c_int)]
+
+class _mmsghdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _msghdr), ("msg_len", ctypes.c_uint)]
+
+class _sockaddr_in(ctypes.Structure):
+    _fields_ = [("sin_family", ctypes.c_ushort), ("sin_port", ctypes.c_uint16),
+                ("sin_addr", ctypes.c_uint8 * 4), ("sin_zero", ctypes.c_uint8 * 8)]
+
+_sendmmsg = None
+_recvmmsg = None
+if sys.platform.startswith("linux"):
+    try:
+        _libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        _sendmmsg = _libc.sendmmsg
+        _sendmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+        _sendmmsg.restype = ctypes.c_int
+        _recvmmsg = _libc.recvmmsg
+        _recvmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+        _recvmmsg.restype = ctypes.c_int
+    except (OSError, AttributeError): # no glibc, fall back to sendto/recv
+        _sendmmsg = None
+        _recvmmsg = None
+
+_RX_SLOTS = 128 # upload replies fetched per recvmmsg call
+_RX_SLOT_SIZE = 1024 # enough for any reply, including messages that echo a long filename
+
+# fixed commands, encoded once instead of on every send (status and position get polled)
+_CMD_VER = b"M99999"
+_CMD_LIST = b"M20"
+_CMD_SYN = b"syn"
+_CMD_HOME = b"G28 Z"
+_CMD_POS = b"M114"
+_CMD_STATUS = b"M27"
+_CMD_STOP = b"M33"
+_CMD_SAVE = b"M29"
+
+def _encode(code) -> bytes: # commands can be given as str or as one of the pre-encoded constants above
+    return code if isinstance(code, (bytes, bytearray)) else code.encode("utf-8")
+
+_EXT_RE = re.compile(r"\.(?:ctb|goo)", re.IGNORECASE) # printable file extensions, used to split names from sizes
+
+# (shift, mask) pairs for _xor_checksum, built once. they cover anything up to 2 KiB, so a whole 1280 byte chunk
+_XOR_FOLDS = tuple((width, (1 << width) - 1) for width in (8192, 4096, 2048, 1024, 512, 256, 128, 64, 32, 16, 8))
+
+def _xor_checksum(data) -> int: # xor of every byte, folded in C via python's big ints instead of a per-byte loop
+    n = int.from_bytes(data, "little")
+    width = 16384
+    while n >> width: # longer than the precomputed folds cover
+        width *= 2
+    while width > 16384:
+        width //= 2
+        n = (n >> width) ^ (n & ((1 << width) - 1))
+    for width, mask in _XOR_FOLDS:
+        n = (n >> width) ^ (n & mask)
+    return n
+
+_CHUNK = 1280 # bytes of file data per upload packet
+_PACKET = _CHUNK + 6 # plus 4 offset bytes, the checksum and the 0x83 end marker
+_PROGRESS_STEP = 65536 # bytes between progress_callback calls during an upload
+
+def _pack_chunks(f, mv, pos, end, count, first=_CHUNK, pack_into=struct.pack_into, xor=_xor_checksum) -> tuple:
+    # the per-batch hot loop, kept flat with its helpers bound as locals.
+    # fills mv with up to count packets read from f at file offset pos, returns (packet views, data sizes)
+    packets = []
+    sizes = []
+    start = 0
+    size = first # the printer may ask for a shorter first chunk after a resend
+    readinto = f.readinto
+    while count and pos < end:
+        n = readinto(mv[start:start + size])
+        if not n:
+            break # file got shorter since we started
+        data_end = start + n
+        pack_into("<I", mv, data_end, pos) # offset trailer, written in place
+        mv[data_end + 4] = xor(mv[start:data_end]) ^ ((pos ^ (pos >> 8) ^ (pos >> 16) ^ (pos >> 24)) & 0xFF)
+        mv[data_end + 5] = 0x83
+        packets.append(mv[start:data_end + 6])
+        sizes.append(n)
+        pos += n
+        start = data_end + 6
+        size = _CHUNK
+        count -= 1
+    return packets, sizes
 
 
 class Printer():
     def __init__(self, ip) -> None:
-        if ip == "127.0.0.1":
-            self.debug = True
+        self.debug = (ip == "127.0.0.1")
         self.ip = ip
         self.port = 3000
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) 
-        self.sock.settimeout(3)
         self.buffSize = 4096
-        self.jobs = Queue()
-        self.send_delay = 0.005
+        self._rx_buf = bytearray(65536) # every plain recv lands here, big enough for any datagram
+        self._rx_mv = memoryview(self._rx_buf)
+        self._selector = selectors.DefaultSelector() # lets uploads wait for replies and then drain them all in one go
+        self.__openSocket__()
+        if _recvmmsg is not None: # reply ring for recvmmsg, set up once and reused for every batch
+            self._rx_ring = bytearray(_RX_SLOTS * _RX_SLOT_SIZE)
+            ring_base = ctypes.addressof((ctypes.c_char * len(self._rx_ring)).from_buffer(self._rx_ring))
+            self._rx_iovs = (_iovec * _RX_SLOTS)()
+            self._rx_hdrs = (_mmsghdr * _RX_SLOTS)()
+            for i in range(_RX_SLOTS):
+                self._rx_iovs[i].iov_base = ring_base + i * _RX_SLOT_SIZE
+                self._rx_iovs[i].iov_len = _RX_SLOT_SIZE
+                self._rx_hdrs[i].msg_hdr.msg_iov = ctypes.pointer(self._rx_iovs[i])
+                self._rx_hdrs[i].msg_hdr.msg_iovlen = 1
+        self.send_delay = 0 # minimum pause between batches, raised automatically during an upload if the printer struggles
+        self.batch_size = 64 # most upload chunks in flight before waiting on the replies
+        self.window = 8 # upload chunks in flight to start with, grows by one per clean batch
+        self.ack_paced = True # let the printer's acks set the pace. False sends one chunk at a time with a fixed send_delay
+        self.progress_callback = None # called as progress_callback(filelength, remaining) from the uploading thread after every batch
+        self._tx_buf = bytearray(self.batch_size * _PACKET) # upload packets are built in place here
+        self._tx_mv = memoryview(self._tx_buf)
         self.retries = 0
         self.remaining = 0
         self.filelength = 0
+        self._ident_cache = None # parsed M99999 reply, see __getIdent__
         
-    def __sendRecieveSingle__(self,code,buffSize=-1) -> str: # sends an M-code then recieves a single packet answer
-        self.sock.sendto(bytes(code, "utf-8"), (self.ip, self.port))
+    def __openSocket__(self) -> None: # creates the socket and connects it to the printer, so sends skip the address lookup
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) 
+        self.sock.settimeout(3)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20) # room for a full batch of upload packets
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20) # and for all of their replies
+        self._selector.register(self.sock, selectors.EVENT_READ)
+        try:
+            self.sock.connect((self.ip, self.port)) # also drops datagrams from anyone but the printer
+            self._connected = True
+        except OSError: # bad address or no route yet, sendto will report it when it's actually used
+            self._connected = False
+
+    def setIp(self, ip) -> None:
+        """Points this printer object at a different address
+
+        Args:
+            ip (str): new printer IP address
+        """
+        self._selector.unregister(self.sock)
+        self.sock.close()
+        self.ip = ip
+        self.__openSocket__()
+        self.invalidateIdent()
+
+    def __send__(self, data) -> None:
+        if self._connected:
+            self.sock.send(data)
+        else:
+            self.sock.sendto(data, (self.ip, self.port))
+
+    def __sendRecieveSingle__(self,code,buffSize=-1,resend=False) -> str: # sends an M-code then recieves a single packet answer
         if buffSize == -1:
             buffSize = self.buffSize
-        try:
-            output = self.sock.recv(buffSize)
-        except: # maybe printer needed a sec longer, retry on fail
-            output = self.sock.recv(buffSize)
-        finally:
-            return output
+        if resend: # only for queries: a second copy of a command that changes state would run it twice and leave a spare ok behind
+            return self.__sendAndWait__(_encode(code), buffSize)
+        return self.__sendAndWait__(_encode(code), buffSize, timeout=self.sock.gettimeout(), max_retries=0)
+
+    def __sendAndWait__(self, data, buffSize, timeout=0.3, max_retries=3) -> bytes: # sends a datagram, resending it with a doubled wait each time nothing comes back
+        try: # drop late answers to an earlier resend so they don't get mistaken for this one
+            self.__recvReady__(0)
+        except socket.timeout:
+            pass
+        for attempt in range(max_retries + 1):
+            self.__send__(data)
+            if self._selector.select(timeout):
+                return bytes(self.__recvInto__(buffSize))
+            timeout *= 2 # 0.3, 0.6, 1.2, 2.4: a lost packet costs well under a second, a dead printer 4.5s
+        raise socket.timeout("timed out")
         
         
+    def __sendBatch__(self, packets) -> None: # sends a list of datagrams (writable buffers), in one syscall where possible
+        if _sendmmsg is not None and len(packets) > 1:
+            addr = None
+            if not self._connected:
+                try:
+                    addr = _sockaddr_in(socket.AF_INET, socket.htons(self.port),
+                                        (ctypes.c_uint8 * 4)(*socket.inet_aton(self.ip)))
+                except OSError: # not a dotted ip, let sendto resolve it
+                    addr = None
+            if self._connected or addr is not None:
+                n = len(packets)
+                iovs = (_iovec * n)()
+                hdrs = (_mmsghdr * n)()
+                for i, packet in enumerate(packets):
+                    # point straight at the packet's memory, no copy
+                    iovs[i].iov_base = ctypes.addressof((ctypes.c_char * len(packet)).from_buffer(packet))
+                    iovs[i].iov_len = len(packet)
+                    if addr is not None: # a connected socket already knows where to send
+                        hdrs[i].msg_hdr.msg_name = ctypes.addressof(addr)
+                        hdrs[i].msg_hdr.msg_namelen = ctypes.sizeof(addr)
+                    hdrs[i].msg_hdr.msg_iov = ctypes.pointer(iovs[i])
+                    hdrs[i].msg_hdr.msg_iovlen = 1
+                sent = 0
+                while sent < n:
+                    res = _sendmmsg(self.sock.fileno(), ctypes.addressof(hdrs) + sent * ctypes.sizeof(_mmsghdr), n - sent, 0)
+                    if res < 0:
+                        err = ctypes.get_errno()
+                        raise OSError(err, os.strerror(err))
+                    sent += res
+                return
+        for packet in packets:
+            self.__send__(packet)
+
+    def __recvReady__(self, timeout) -> list: # waits for the socket to become readable, then drains every datagram already queued
+        if not self._selector.select(timeout):
+            raise socket.timeout("timed out")
+        replies = []
+        if _recvmmsg is not None:
+            while True:
+                n = _recvmmsg(self.sock.fileno(), ctypes.addressof(self._rx_hdrs), _RX_SLOTS, socket.MSG_DONTWAIT, None)
+                if n < 0:
+                    err = ctypes.get_errno()
+                    if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                        break
+                    raise OSError(err, os.strerror(err))
+                for i in range(n):
+                    start = i * _RX_SLOT_SIZE
+                    replies.append(bytes(self._rx_ring[start:start + self._rx_hdrs[i].msg_len]))
+                if n < _RX_SLOTS:
+                    break
+            return replies
+        prev = self.sock.gettimeout()
+        self.sock.setblocking(False)
+        try:
+            while True:
+                try:
+                    replies.append(bytes(self.__recvInto__(self.buffSize)))
+                except (BlockingIOError, InterruptedError):
+                    break
+        finally:
+            self.sock.settimeout(prev)
+        return replies
+
+    def __recvInto__(self, buffSize) -> memoryview: # recieves one datagram into the shared rx buffer, the view is only valid until the next recv
+        n = self.sock.recv_into(self._rx_buf, min(buffSize, len(self._rx_buf)))
+        return self._rx_mv[:n]
+
+    def __sendRecieveWithOk__(self, code) -> bytes: # sends an M-code answered by a message plus a separate ok, returns the message
+        self.__send__(_encode(code))
+        replies = []
+        while len(replies) < 2: # usually both are already queued by the time we wake up
+            try:
+                replies += self.__recvReady__(self.sock.gettimeout())
+            except socket.timeout:
+                if not replies:
+                    raise
+                break # the trailing ok got lost, the message is all we need
+        for reply in replies: # the ok can come first or last
+            if reply.split()[:1] != [b"ok"]:
+                return reply
+        return replies[0]
+
+    def __absorbOk__(self) -> None: # swallows the ok the printer sends after an error message, without failing if it got lost
+        try:
+            self.__recvReady__(self.sock.gettimeout())
+        except socket.timeout:
+            pass
+
     def __clearBuffer__(self) -> None:
-        output = ""
         while True:
             try:
-                output = self.sock.recv(self.buffSize)
+                self.__recvInto__(self.buffSize)
             except:
                 break  # connection closed or no more data
 
-    def __sendRecieveSingleNice__(self,code, buffSize=-1) -> str: # sends an M-code then recieves a single packet answer
+    def __sendRecieveSingleNice__(self,code, buffSize=-1, resend=False) -> str: # sends an M-code then recieves a single packet answer
         if buffSize == -1:
             buffSize = self.buffSize
-        output = self.__stripFormatting__(self.__sendRecieveSingle__(code,buffSize))
+        output = self.__stripFormatting__(self.__sendRecieveSingle__(code,buffSize,resend))
         return output#.decode('utf-8')
 
-    def __getUniversal__(self,split) -> str:
-        output = (str)(self.__sendRecieveSingle__("M99999")).split(" ")[split].split(":")[1] # splits b'ok MAC:00:e0:4c:27:00:2e IP:192.168.1.174 VER:V1.4.1 ID:2e,00,27,00,17,50,53,54 NAME:CBD\r\n' into just a single field
+    def __getIdent__(self) -> dict: # the M99999 answer never changes, so it is only asked for once
+        if self._ident_cache is None:
+            ident = {}
+            for field in self.__sendRecieveSingleNice__(_CMD_VER, resend=True).split(" "): # ok MAC:00:e0:4c:27:00:2e IP:192.168.1.174 VER:V1.4.1 ID:2e,00,27,00,17,50,53,54 NAME:CBD
+                if ":" in field:
+                    key, value = field.split(":", 1)
+                    ident[key] = value
+            if "VER" not in ident: # garbage or a stale reply to something else, not an answer from a live printer
+                raise ValueError("no VER field in M99999 reply") # nothing is cached, the next call asks again
+            self._ident_cache = ident
+        return self._ident_cache
+
+    def invalidateIdent(self) -> None:
+        """Forgets the cached M99999 answer so the next getVer/getID/getName asks the printer again
+        """
+        self._ident_cache = None
+
+    def __getUniversal__(self,key) -> str:
+        output = self.__getIdent__().get(key)
         if not output:
             return "No Response"
         else:
@@ -59,7 +317,7 @@ class Printer():
         Returns:
             str: Version
         """
-        return self.__getUniversal__(3)
+        return self.__getUniversal__("VER")
         
     def getID(self) -> str:
         """Returns Printers UID
@@ -67,7 +325,7 @@ class Printer():
         Returns:
             str: UID
         """
-        return self.__getUniversal__(4)
+        return self.__getUniversal__("ID")
 
     def getName(self) -> str:
         """Gets the printers Name
@@ -75,19 +333,20 @@ class Printer():
         Returns:
             str: Name
         """
-        return self.__getUniversal__(5).split("\\")[0]
+        return self.__getUniversal__("NAME")
 
     def __stripFormatting__(self, string) -> str: # trims b'End file list\r\n' to End file list
-        string = (string.decode("utf-8"))
+        string = str(string, "utf-8") # bytes or a view into the rx buffer
         string = string.rstrip()
         return string
 
-    def __stripSpaceFromBack__(self, string):
-        exts = [".ctb", ".goo"]
-        lower_string = string.lower()
-        ext_index = max(lower_string.rfind(ext) for ext in exts)
-        ext = next(ext for ext in exts if lower_string.rfind(ext) == ext_index)
-        return string[:ext_index + len(ext)], string[ext_index + len(ext):].strip()
+    def __stripSpaceFromBack__(self, string): # splits "name.ctb 12345" at the last extension into (name.ctb, 12345)
+        m = None
+        for m in _EXT_RE.finditer(string):
+            pass
+        if not m:
+            return string, ""
+        return string[:m.end()], string[m.end():].strip()
 
     def getCardFiles(self) -> list:
         """Returns the list of CTB files on the storage
@@ -95,26 +354,28 @@ class Printer():
         Returns:
             list: (filename, size)
         """
-        self.sock.sendto(bytes("M20", "utf-8"), (self.ip, self.port))
+        self.__send__(_CMD_LIST)
         output = []
-        request = self.__stripFormatting__((self.sock.recv(self.buffSize)))
-
-        while request != "End file list":
-            if ".ctb" in request.lower() or ".goo" in request.lower():
-                if request != "Begin file list" and self.__stripSpaceFromBack__(request)[1] != 0: # this prevents deleted files from appearing
-                    #output.append(request)
-                    output.append(self.__stripSpaceFromBack__(request))
-
-            request = self.__stripFormatting__((self.sock.recv(self.buffSize)))
-        self.sock.sendto(bytes("syn", "utf-8"), (self.ip, self.port)) # send a meaningless message - printer is waiting for confirmation of any sort
-        confirmation = self.sock.recv(self.buffSize) # absorb the first ok message
-        confirmation = self.sock.recv(self.buffSize) # absorb the extra ok message
+        done = False
+        while not done:
+            # one entry per datagram in practice, but don't rely on it
+            for request in self.__stripFormatting__(self.__recvInto__(65536)).splitlines():
+                request = request.rstrip()
+                if request == "End file list":
+                    done = True
+                    break
+                if ".ctb" in request.lower() or ".goo" in request.lower():
+                    if request != "Begin file list":
+                        entry = self.__stripSpaceFromBack__(request)
+                        if entry[1] != "0": # this prevents deleted files from appearing
+                            output.append(entry)
+        self.__sendRecieveWithOk__(_CMD_SYN) # send a meaningless message - printer is waiting for confirmation of any sort, and answers with two oks
         return(output)
     
     def homeAxis(self) -> None:
         """Homes Z axis
         """
-        self.__sendRecieveSingle__("G28 Z")
+        self.__sendRecieveSingle__(_CMD_HOME)
 
     def getAxis(self) -> float:
         """Gets current Axis position
@@ -122,7 +383,10 @@ class Printer():
         Returns:
             float: current Z pos
         """
-        pos = (float)((str)(self.__sendRecieveSingle__("M114")).split(" ")[4].strip("Z:"))
+        reply = self.__sendRecieveSingle__(_CMD_POS, resend=True) # b'ok C: X:0.000000 Y:0.000000 Z:155.000000 E:0.000000\r\n'
+        i = reply.index(b"Z:") + 2
+        end = reply.find(b" ", i)
+        pos = (float)(reply[i:end if end != -1 else len(reply)])
         return pos
 
     def jogHard(self,distance) -> None: # uses absolute pos
@@ -157,8 +421,7 @@ class Printer():
         Returns:
             str: If is action complete
         """
-        output = (str)(self.__sendRecieveSingleNice__("M30 "+filename))
-        confirmation = self.sock.recv(self.buffSize) #absorb the ok message
+        output = self.__stripFormatting__(self.__sendRecieveWithOk__("M30 "+filename))
         return(output)
 
     def startPrinting(self,filename) -> str:
@@ -179,14 +442,10 @@ class Printer():
             str: Machine State
         """
         try:
-            string = self.__sendRecieveSingleNice__("M27")
+            string = self.__stripFormatting__(self.__sendRecieveWithOk__(_CMD_STATUS))
         except:
             return "Timeout"
-        if string == "ok":
-            string = self.__stripFormatting__(self.sock.recv(self.buffSize))
-        else:
-            confirmation = self.sock.recv(self.buffSize) #absorb the ok message
-        if string.split()[0] == "SD":
+        if string.split()[:1] == ["SD"]:
             return f"Printing {string}"
         return "Not Printing"
 
@@ -196,8 +455,9 @@ class Printer():
         Returns:
             list: [completed, total]
         """
-        string = self.__sendRecieveSingleNice__("M27")
-        return string.split()[3].split("/")
+        reply = self.__sendRecieveWithOk__(_CMD_STATUS).rstrip() # b'SD printing byte 1000/256777'
+        num, _, den = reply[reply.rindex(b" ") + 1:].partition(b"/")
+        return [int(num), int(den)]
 
     def stopPrinting(self) -> str:
         """Stops current print
@@ -205,7 +465,7 @@ class Printer():
         Returns:
             str: If completed
         """
-        return self.__sendRecieveSingleNice__("M33")
+        return self.__sendRecieveSingleNice__(_CMD_STOP)
 
 
     # upload structure
@@ -215,12 +475,14 @@ class Printer():
     # M29
     # all of this is encoded
 
-    def uploadFile(self,fileNameLocal,fileNameCard="") -> str:
+    def uploadFile(self,fileNameLocal,fileNameCard="",hasher=None,abort=None) -> str:
         """Uploads file to storage
 
         Args:
             fileNameLocal (str): local filename including extension
             fileNameCard (str, optional): filename on storage including extension. Defaults to same as local filename.
+            hasher (optional): hashlib style object, fed the file's bytes in order as the printer acknowledges them
+            abort (threading.Event, optional): checked before every batch, once set the transfer stops where it is
 
         Returns:
             str: If completed
@@ -230,63 +492,126 @@ class Printer():
         # start transmission
         m28 = self.__sendRecieveSingleNice__(f"M28 {fileNameCard}")
         if "Error" in m28 or "Failed" in m28:
-            confirmation = self.sock.recv(self.buffSize) #absorb the ok message after our error message
+            self.__absorbOk__()
             return f"M28 Error: {m28}"
+        try: # anything still queued now is stale, don't let it be read as the first chunk's ack
+            self.__recvReady__(0)
+        except socket.timeout:
+            pass
         
         self.filelength=os.stat(fileNameLocal).st_size
-        f=open(fileNameLocal,'rb')
-        self.remaining=self.filelength
-        offs=0
-        retr=0
-        print(fileNameCard,' Length:',self.filelength)
-        send = True
-        readamt = 1280
-        while self.remaining > 0:
-            if send:
+        f=open(fileNameLocal,'rb',buffering=1 << 20) # one disk read per ~800 chunks, seeks back for resends stay inside the buffer
+        sock_timeout = self.sock.gettimeout() # raised while retrying timeouts below, put back in the finally however the transfer ends
+        try:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            self.remaining=self.filelength
+            offs=0
+            retr=0
+            print(fileNameCard,' Length:',self.filelength)
+            readamt = _CHUNK
+            hashed = 0 # bytes fed to hasher so far
+            reported = self.remaining # what progress_callback was last told
+            ack_paced = self.ack_paced
+            window = min(self.window, self.batch_size) if ack_paced else 1
+            delay = self.send_delay
+            if len(self._tx_buf) < self.batch_size * _PACKET:
+                self._tx_buf = bytearray(self.batch_size * _PACKET)
+                self._tx_mv = memoryview(self._tx_buf)
+            mv = self._tx_mv
+            aborted = False
+            while self.remaining > 0:
+                if abort is not None and abort.is_set():
+                    aborted = True # the caller is shutting down, leave the rest unsent
+                    break
+                # prepare a batch of chunks starting at the last acknowledged offset
                 f.seek(offs)
-                dd=f.read(readamt)
-                dc=bytearray(offs.to_bytes(length=4, byteorder='little'))
-                cxor=0
-                for c in dd: cxor=cxor ^ c
-                for c in dc: cxor=cxor ^ c
-                dc.append(cxor)
-                dc.append(0x83)
-                self.sock.sendto(dd+dc, (self.ip,self.port))
+                packets, sizes = _pack_chunks(f, mv, offs, self.filelength, window, min(readamt, _CHUNK))
+                readamt = _CHUNK
+                if not packets:
+                    return "Transfer Error: local file changed during upload"
+                self.__sendBatch__(packets)
+
+                # the printer answers every chunk with either ok or resend, in order
+                rewind = False
+                acked = 0
+                while acked < len(sizes):
+                    try:
+                        replies = self.__recvReady__(self.sock.gettimeout())
+                    except Exception as e:
+                        if "time" in str(e) and retr < 5:
+                            retr +=1
+                            self.sock.settimeout(retr + 3)
+                            rewind = True
+                            break # resend everything that wasn't acknowledged
+                        else:
+                            return f"Transfer Error: {e}"
+                    for s in replies:
+                        if acked >= len(sizes):
+                            break # late replies from an earlier batch
+                        word = s.split()[0] if s.split() else b""
+                        if word == b"ok":
+                            if not rewind:
+                                if hasher is not None and offs == hashed:
+                                    hasher.update(packets[acked][:sizes[acked]]) # the data is still in the send buffer
+                                    hashed += sizes[acked]
+                                offs=offs+sizes[acked]
+                                self.remaining -= sizes[acked]
+                            acked += 1
+                        elif word == b"resend":
+                            # example: b'resend 1280,offset error:6165760'
+                            # every chunk after the bad one gets a resend too, only the first one counts
+                            if not rewind:
+                                s_str = s.decode("utf-8")
+                                parts = s_str.split()
+                                amt_str = parts[1].split(",")[0]
+                                offs_str = parts[2].split(":")[1]
+                                readamt = int(amt_str)
+                                offs = int(offs_str)
+                                self.remaining = self.filelength - offs
+                                retr += 1
+                                rewind = True
+                            acked += 1
+                        # anything else is a garbage message, keep waiting for the real answer
+                if not ack_paced:
+                    pass # fixed pacing, exactly what the user set
+                elif rewind: # back off: halve the window and slow down
+                    window = max(1, window // 2)
+                    delay = min(max(delay * 2, 0.001), 0.1)
+                elif window < self.batch_size:
+                    window += 1
+                print(retr,self.remaining,end='   \r')
+                if self.progress_callback is not None and (abs(reported - self.remaining) >= _PROGRESS_STEP or not self.remaining):
+                    reported = self.remaining
+                    self.progress_callback(self.filelength, self.remaining)
+                if delay:
+                    sleep(delay) # skipped at 0, no point in a syscall per batch just to yield
+            if hasher is not None and hashed < self.filelength and not aborted:
+                # a lost ok let the printer move us past bytes we never hashed, read the rest from disk
+                f.seek(hashed)
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    hasher.update(block)
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED) # sent and hashed, don't let it crowd the page cache
+        finally:
+            f.close()
+            self.sock.settimeout(sock_timeout)
+
+        if aborted:
+            # end the upload session like a finished transfer would, then take the truncated file off the card
+            # so nothing half sent sits there under the real name
             try:
-                s = self.sock.recv(self.buffSize)
-            except Exception as e:
-                s = b""
-                if "time" in str(e) and retr < 5:
-                    retr +=1
-                    self.sock.settimeout(retr + 3)
-                    print(retr,self.remaining,end='   \r')
-                    sleep(self.send_delay)
-                    continue
-                else:
-                    return f"Transfer Error: {e}"
-            if s.split()[0] == b"ok":
-                readamt = 1280
-                if send:
-                    offs=offs+len(dd)
-                    self.remaining -= len(dd)
-                else:
-                    send = True
-            elif s.split()[0] == b"resend":
-                # example: b'resend 1280,offset error:6165760'
-                s_str = s.decode("utf-8")
-                parts = s_str.split()
-                amt_str = parts[1].split(",")[0]
-                offs_str = parts[2].split(":")[1]
-                readamt = int(amt_str)
-                offs = int(offs_str)
-                self.remaining = self.filelength - offs
-                retr += 1
-                send = True
-            else:
-                send = False # garbage message? 
-            print(retr,self.remaining,end='   \r')
-            sleep(self.send_delay)
-        f.close()
+                self.__recvReady__(0) # acks for the last batch that are still queued
+            except socket.timeout:
+                pass
+            try:
+                self.__sendRecieveWithOk__(_CMD_SAVE)
+                self.removeCardFiles([fileNameCard])
+            except Exception:
+                pass # best effort, the caller is going away either way
+            self.filelength = 0
+            self.remaining = 0
+            return "Transfer Error: aborted"
 
         self.filelength = 0
         self.remaining = 0
@@ -297,19 +622,58 @@ class Printer():
             if retr > 0:
                 retstring = f"{retr} Transfer Error(s): Consider increasing send delay.\n"
             retstring = retstring + f"Size Verify Error: {M4012}"
-            confirmation = self.sock.recv(self.buffSize) #absorb the ok message after our error message
+            self.__absorbOk__()
             return retstring
 
-        retstring = self.__sendRecieveSingleNice__("M29")
-        sleep(0.005)
-        confirmation = self.sock.recv(self.buffSize)
+        retstring = self.__stripFormatting__(self.__sendRecieveWithOk__(_CMD_SAVE))
         return retstring
     
     def formatCard(self):
         """Formats storage
         """
-        for file in self.getCardFiles():
-            self.removeCardFile(file[0])
+        self.removeCardFiles([file[0] for file in self.getCardFiles()])
+
+    def removeCardFiles(self,filenames) -> list:
+        """Removes several files from storage, pipelining the deletes
+
+        Args:
+            filenames (list): filenames to remove including extension
+
+        Returns:
+            list: filenames that could not be removed
+        """
+        names = list(filenames)
+        if not names:
+            return []
+        # send every delete up front, then collect the answers: one ok per file, usually after a "File deleted:name".
+        # done as soon as every ok is in, whatever the confirmation text looked like
+        self.__sendBatch__([bytearray(b"M30 " + name.encode("utf-8")) for name in names])
+        unconfirmed = set(names)
+        oks = 0
+        while oks < len(names):
+            try:
+                replies = self.__recvReady__(self.sock.gettimeout())
+            except socket.timeout:
+                break # the printer went quiet, the listing below settles what is left
+            for reply in replies:
+                reply = str(reply, "utf-8", "replace").rstrip()
+                if reply.split()[:1] == ["ok"]:
+                    oks += 1
+                elif reply.startswith("File deleted:"):
+                    unconfirmed.discard(reply[len("File deleted:"):])
+        if not unconfirmed:
+            return []
+        # no confirmation we could read, that doesn't mean the delete failed. ask the card once instead of
+        # sending M30 again for files that may already be gone
+        try: # late answers to the deletes would otherwise be read as part of the listing
+            self.__recvReady__(0)
+        except socket.timeout:
+            pass
+        try:
+            on_card = {entry[0] for entry in self.getCardFiles()}
+        except Exception:
+            return [name for name in names if name in unconfirmed] # can't tell, report them rather than guess
+        return [name for name in names if name in unconfirmed and name in on_card]
     
 def main():
     ip = input("Enter printer IP address (e.g. 192.168.1.174): ").strip()
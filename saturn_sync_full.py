@@ -1,9 +1,17 @@
 import os
+import sys
 import json
+import re
+import signal
+import difflib
 import threading
 import hashlib
+import subprocess
 import time
-from queue import Queue, Empty
+from functools import lru_cache
+from queue import Queue, PriorityQueue, Empty
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -15,21 +23,47 @@ from pystray import MenuItem as item
 from PIL import Image, ImageDraw, ImageTk
 
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+from watchdog.events import FileSystemEventHandler, FileClosedEvent, FileCreatedEvent, FileMovedEvent, FileDeletedEvent
 
 from CBD_Api import Printer
 
+try:
+    import blake3 # optional, hashes big slice files several times faster than sha256
+except ImportError:
+    blake3 = None
+
+try:
+    import orjson # optional, faster metadata (de)serialisation
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    encode_json = orjson.dumps
+    decode_json = orjson.loads
+else:
+    def encode_json(obj):
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")  # compact like orjson, the log is machine-only
+    decode_json = json.loads
+
 CONFIG_FILE = "sync_config.json"
-METADATA_FILE = "file_metadata.json"
+METADATA_FILE = "file_metadata.jsonl"  # append-only log of {"op": "put"/"del", "key": name, "val": meta}
+LEGACY_METADATA_FILE = "file_metadata.json"  # whole-state file used by older versions, migrated on load
+METADATA_SCHEMA = 3  # 2: integer mtime_ns and ino instead of the float mtime. 3: checksum algo kept once in the header
 LOG_UNKNOWN_FILE = "unknown_printer_msgs.log"
+CHECKSUM_ALGO = "blake3" if blake3 else "sha256" # recorded in the metadata header, switching algorithms rehashes everything
+PROGRESS_RE = re.compile(r"(\d+)/(\d+)")  # bytes done/total in an M27 answer, e.g. "SD printing byte 1000/256777"
+FUZZY_SCALE = 80 / 95  # the first 95% of the file's bytes cover the first 80% of the print time
+SLICE_EXTENSIONS = (".ctb", ".goo")  # files the sync folder tracks, see is_slice_file
 
 # Default config values
 DEFAULT_CONFIG = {
     "printer_ip": "192.168.0.230",
     "sync_folder": str(Path.home() / "SaturnSync"),
     "ping_interval_minutes": 1,
-    "send_delay": 0.001,
+    "send_delay": 0,
     "delete_remote": False,
+    "send_ack_mode": True,  # Hidden, false falls back to one chunk per send_delay for printers that can't keep up
+    "max_concurrent_uploads": 2,  # Hidden, files that can wait on their slicer at once. transfers still go one by one
     "log_unknown_messages": False  # Hidden, must edit config file manually    
 }
 
@@ -37,12 +71,18 @@ DEFAULT_CONFIG = {
 ICON_SIZE = 64
 RES_FOLDER = os.path.join(os.path.dirname(__file__), "res")
 BASE_ICON_PATH = os.path.join(RES_FOLDER, "printer_base.png")
+BADGE_VERSION = 1  # bump when overlay_icon draws differently, so cached badges get redrawn
+if sys.platform == "win32":
+    BADGE_CACHE_FOLDER = os.path.join(os.environ.get("LOCALAPPDATA") or str(Path.home()), "SaturnSync", "cache")
+else:
+    BADGE_CACHE_FOLDER = os.path.join(os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache"), "saturn_sync")
 
 
 def load_base_icon():
     try:
         base_icon = Image.open(BASE_ICON_PATH).convert("RGBA")
-        base_icon = base_icon.resize((ICON_SIZE, ICON_SIZE))
+        if base_icon.size != (ICON_SIZE, ICON_SIZE):  # a base drawn at the icon size needs no resampling
+            base_icon = base_icon.resize((ICON_SIZE, ICON_SIZE))
         return base_icon
     except Exception as e:
         print(f"Failed to load base icon: {e}")
@@ -50,12 +90,6 @@ def load_base_icon():
         img = Image.new("RGBA", (ICON_SIZE, ICON_SIZE), (0, 122, 204, 255))
         return img
         
-def set_window_icon(root, pil_image):
-    icon_img = pil_image.resize((ICON_SIZE, ICON_SIZE))
-    tk_icon = ImageTk.PhotoImage(icon_img)
-    root.iconphoto(True, tk_icon)
-    root._icon_image = tk_icon
-    
 def overlay_icon(base_icon, overlay_type):
     # overlay_type: "synced", "syncing", "offline", "error"
     # bottom right corner small badge icon
@@ -100,8 +134,46 @@ def overlay_icon(base_icon, overlay_type):
         draw.line([(x1-3, y0),(x1-3, y1)], fill="blue", width=5)
     return icon
 
+@lru_cache(maxsize=64)
+def short_name(name):
+    # a file name as the status bar shows it, up to 18 characters. cut once per name, not on every progress update,
+    # and an upload and a print taking turns on the bar both stay cached
+    return name if len(name) <= 18 else name[:15] + "..."
+
+def is_slice_file(name):
+    # both extensions are 4 characters, so only the tail gets lowercased instead of the whole path
+    return name[-4:].lower() in SLICE_EXTENSIONS
+
+def load_status_icon(base_icon, overlay_type):
+    # badges are drawn once and kept in the user's cache folder, redrawn when the base icon is newer. the drawing
+    # version and icon size are part of the name, so changing either never picks up a stale badge
+    cache_path = os.path.join(BADGE_CACHE_FOLDER, f"badge_{overlay_type}_{ICON_SIZE}_v{BADGE_VERSION}.png")
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(BASE_ICON_PATH):
+            icon = Image.open(cache_path)
+            icon.load()
+            return icon.convert("RGBA")
+    except OSError:
+        pass  # no cache yet, or no base icon to compare against
+    icon = overlay_icon(base_icon, overlay_type)
+    try:
+        os.makedirs(BADGE_CACHE_FOLDER, exist_ok=True)
+        icon.save(cache_path, optimize=True)
+    except OSError:
+        pass  # no writable cache folder, just draw it every time
+    return icon
+
 class SyncAgent:
+    TOOLTIPS = {  # filled in by update_tray_tooltip, only the current status gets formatted
+        "offline": "Saturn Sync Agent - Offline\nPrinter IP: {ip}",
+        "syncing": "Saturn Sync Agent - Syncing\nFiles syncing: {syncing}",
+        "synced": "Saturn Sync Agent - Synced\nPrinter IP: {ip}",
+        "error": "Saturn Sync Agent - Error\nPending errors: {errors}",
+        "printing": "Saturn Sync Agent - Printing\n{printing}",
+    }
+
     def __init__(self):
+        self.metadata_lock = threading.Lock()
         self.load_config()
         self.load_metadata()
 
@@ -109,34 +181,52 @@ class SyncAgent:
         self.sync_folder = Path(self.config["sync_folder"])
         self.ping_interval = self.config["ping_interval_minutes"] * 60
         self.printer.send_delay = self.config["send_delay"] * 1.0
+        self.printer.ack_paced = self.config.get("send_ack_mode", True)
 
         self.log_unknown = self.config.get("log_unknown_messages", False)
 
         # Ensure sync folder exists
         self.sync_folder.mkdir(parents=True, exist_ok=True)
 
-        self.metadata_lock = threading.Lock()
         self.sync_lock = threading.Lock()
 
         self.stop_event = threading.Event()
 
         self.status = "offline"  # offline, syncing, synced, error
-        self.error_files = set()
+        self.error_files = set()  # uploads that failed, cleared once the file goes through
+        self.errors = deque(maxlen=50)  # (key, message), newest last. one entry per key so retries don't pile up
         self.syncing_files = set()
         self.printer_files = {}
         self.current_uploading_file = ""
         self.current_printing_file = ""
-
-        self.pending_uploads = Queue()
-        self.pending_deletions = Queue()
+        self._printing_status_cache = (float("-inf"), "")  # (time.monotonic(), printingStatus()), see printing_status
+        self._printing_status_lock = threading.Lock()
+
+        # names the folder watcher saw change, handed to the sync thread. one producer and one consumer,
+        # so a deque's atomic append/popleft is all the locking needed
+        self.pending_uploads = deque()
+        self.pending_deletions = deque()
+        # files waiting for the uploader thread, as (-size, name) so the biggest comes out first
+        self.upload_queue = PriorityQueue()
+        self.queued_uploads = set()
+        # files taken off the queue, waiting for their writer to finish or on the wire. several can wait side by
+        # side, but the printer has one upload slot and one socket, so upload_sem lets a single file talk at a time
+        self.uploads_in_flight = set()
+        self.upload_sem = threading.Semaphore(1)
+        workers = max(1, self.config.get("max_concurrent_uploads", 2))
+        self.upload_slots = threading.Semaphore(workers)
+        self.upload_pool = ThreadPoolExecutor(max_workers=workers)
+        self.full_sync_requested = False
+        self.last_sync_fingerprint = None  # see full_sync_all
+        self._work_available = threading.Event()
 
         self.icon_base = load_base_icon()
         self.icon_images = {
-            "offline": overlay_icon(self.icon_base, "offline"),
-            "syncing": overlay_icon(self.icon_base, "syncing"),
-            "synced": overlay_icon(self.icon_base, "synced"),
-            "error": overlay_icon(self.icon_base, "error"),
-            "printing": overlay_icon(self.icon_base, "printing")
+            "offline": load_status_icon(self.icon_base, "offline"),
+            "syncing": load_status_icon(self.icon_base, "syncing"),
+            "synced": load_status_icon(self.icon_base, "synced"),
+            "error": load_status_icon(self.icon_base, "error"),
+            "printing": load_status_icon(self.icon_base, "printing")
         }
 
         # Tray icon related
@@ -149,6 +239,8 @@ class SyncAgent:
         # Internal flags
         self.printing_paused = False
         self.manual_sync_requested = False
+        self.local_snapshot = None  # last scan_local_files result, the UI file list reuses it while it's current
+        self.local_snapshot_version = 0
 
         # UI references
         self.ui = None
@@ -169,23 +261,107 @@ class SyncAgent:
             self.save_config()
 
     def save_config(self):
-        with open(CONFIG_FILE, "w") as f:
+        tmp = CONFIG_FILE + ".tmp"
+        with open(tmp, "w") as f:
             json.dump(self.config, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, CONFIG_FILE)
 
     def load_metadata(self):
+        self.metadata = {}
+        self.metadata_log_entries = 0
         if os.path.isfile(METADATA_FILE):
+            # replay the log, later lines win
+            damaged = False
+            schema = 1
+            algo = None  # only in the schema 3 header, older entries carry their own
+            try:
+                with open(METADATA_FILE, "rb") as f:
+                    for line in f:
+                        try:
+                            record = decode_json(line)
+                        except ValueError:
+                            damaged = True  # half written line from a crash
+                            continue
+                        if record.get("op") == "put":
+                            self.metadata[record["key"]] = record["val"]
+                        elif record.get("op") == "del":
+                            self.metadata.pop(record["key"], None)
+                        elif record.get("op") == "schema":
+                            schema = record.get("version", 1)
+                            algo = record.get("algo")
+                        self.metadata_log_entries += 1
+                if schema > METADATA_SCHEMA or (schema == METADATA_SCHEMA and algo != CHECKSUM_ALGO):
+                    # written by a newer version, or hashed with the other algorithm: recompute everything
+                    # rather than trust entries that only partly line up
+                    self.metadata = {}
+                    damaged = True
+                elif schema < METADATA_SCHEMA:
+                    self.upgrade_metadata()
+                    damaged = True  # rewrite it in the current schema
+                if damaged:
+                    self.compact_metadata()  # so new lines don't get glued onto the broken one
+            except Exception:
+                self.metadata = {}
+        elif os.path.isfile(LEGACY_METADATA_FILE):
             try:
-                with open(METADATA_FILE, "r") as f:
+                with open(LEGACY_METADATA_FILE, "r") as f:
                     self.metadata = json.load(f)
+                self.upgrade_metadata()
+                self.compact_metadata()
             except Exception:
                 self.metadata = {}
         else:
-            self.metadata = {}
-
-    def save_metadata(self):
+            self.compact_metadata()  # start the log with its schema header
+
+    def upgrade_metadata(self):
+        # schema 1 stored st_mtime as a float, carry it over so unchanged files don't all get rehashed
+        for name, meta in list(self.metadata.items()):
+            if "mtime" in meta and "mtime_ns" not in meta:
+                meta["mtime_ns"] = round(meta.pop("mtime") * 1e9)
+            if meta.pop("algo", "sha256") != CHECKSUM_ALGO:  # schemas 1 and 2 tagged each entry
+                del self.metadata[name]
+
+    def save_metadata_entry(self, name, meta):
+        # updates one entry (meta=None removes it) and appends the change to the log
+        self.save_metadata_entries({name: meta})
+
+    def save_metadata_entries(self, entries):
+        # same as save_metadata_entry for a whole dict of changes, in one append
+        with self.metadata_lock:
+            lines = []
+            for name, meta in entries.items():
+                if meta is None:
+                    if self.metadata.pop(name, None) is None:
+                        continue
+                    record = {"op": "del", "key": name}
+                else:
+                    if self.metadata.get(name) == meta:
+                        continue  # unchanged, e.g. an upload re-recording what the scan already had
+                    self.metadata[name] = meta
+                    record = {"op": "put", "key": name, "val": meta}
+                lines.append(encode_json(record) + b"\n")
+            if not lines:
+                return
+            with open(METADATA_FILE, "ab") as f:
+                f.writelines(lines)
+            self.metadata_log_entries += len(lines)
+        if self.metadata_log_entries > 4 * len(self.metadata) + 16:
+            self.compact_metadata()
+
+    def compact_metadata(self):
+        # rewrites the log as one put per entry, swapped in atomically
         with self.metadata_lock:
-            with open(METADATA_FILE, "w") as f:
-                json.dump(self.metadata, f, indent=2)
+            tmp = METADATA_FILE + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(encode_json({"op": "schema", "version": METADATA_SCHEMA, "algo": CHECKSUM_ALGO}) + b"\n")
+                for name, meta in self.metadata.items():
+                    f.write(encode_json({"op": "put", "key": name, "val": meta}) + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, METADATA_FILE)
+            self.metadata_log_entries = len(self.metadata) + 1
 
     def log_unknown_message(self, message_bytes):
         if not self.log_unknown:
@@ -200,8 +376,8 @@ class SyncAgent:
             pass  # Fail silently on logging errors
 
     def run(self):
-        # Main thread for syncing and pinging
-        next_ping = 0
+        # Main thread for syncing and pinging. sleeps until the next ping is due or wake() is called
+        last_ping = None
         while not self.stop_event.is_set():
             now = time.time()
             if self.manual_sync_requested:
@@ -211,11 +387,19 @@ class SyncAgent:
                         continue
                 self.sync_all()
 
-            if now >= next_ping:
+            if last_ping is None or (self.ping_interval > 0 and now >= last_ping + self.ping_interval):
                 self.ping_and_sync()
-                next_ping = now + self.ping_interval
+                last_ping = now
 
-            time.sleep(1)
+            timeout = None  # ping interval 0 means no pinging, only wake ups
+            if self.ping_interval > 0:
+                timeout = max(0, last_ping + self.ping_interval - time.time())
+            if self._work_available.wait(timeout):
+                self._work_available.clear()
+
+    def wake(self):
+        # gets the run loop to look at its state again, e.g. after the ping interval changed
+        self._work_available.set()
 
     def ping_and_sync(self):
         if not self.ping_printer():
@@ -227,27 +411,43 @@ class SyncAgent:
                 self.printer_files = dict(self.printer.getCardFiles())
             except Exception:
                 self.printer_files = {}
-        if self.current_uploading_file != "":
+        if self.uploads_in_flight:
             self.update_status("syncing")
             return
         if self.printing_paused:
             self.update_status("printing")
             return
         self.update_status("synced")  # Assume synced before syncing
-        printJob = self.printer.printingStatus()
+        printJob = self.printing_status()
         if (printJob != "Not Printing"):
             self.update_status("printing")
             self.printing_paused = True
             if self.ui:
-                self.ui.start_upload_progress()
-        self.sync_all()
+                self.ui.root.after(0, self.ui.start_upload_progress)
+        self.full_sync_all()
+
+    def printing_status(self, ttl=2.0):
+        # M27 answer from the last ttl seconds, so a run of queued uploads doesn't ask before every file.
+        # callers that arrive while a query is out wait for its answer instead of sending their own
+        with self._printing_status_lock:
+            now = time.monotonic()
+            checked, status = self._printing_status_cache
+            if now - checked < ttl:
+                return status
+            status = self.printer.printingStatus()
+            self._printing_status_cache = (time.monotonic(), status)
+            return status
+
+    def invalidate_printing_status(self):
+        self._printing_status_cache = (float("-inf"), "")
 
     def ping_printer(self):
         # safeguard against a ping request messing up a send
-        if self.current_uploading_file == "":
+        if not self.uploads_in_flight:
             # the status bar isn't running so we're not sending requests for print updates, or we're not printing
             if not (self.ui and self.ui.root.winfo_exists()) or not self.printing_paused:
                 try:
+                    self.printer.invalidateIdent() # this is a liveness check, it has to hit the network
                     ver = self.printer.getVer()
                     # If getVer succeeds, printer is online
                     return True
@@ -257,12 +457,76 @@ class SyncAgent:
         return True
 
     def sync_all(self):
-        if self.printing_paused or self.current_uploading_file != "":
+        # folder watcher changes only touch the files involved. a user's manual sync, or nothing
+        # pending at all, diffs the whole folder against the printer
+        if self.printing_paused or self.uploads_in_flight:
+            return
+        if self.full_sync_requested or not (self.pending_uploads or self.pending_deletions):
+            self.full_sync_requested = False
+            self.full_sync_all()
+            return
+        with self.sync_lock:
+            self.update_status("syncing")
+            changed = set()
+            deleted = set()
+            while self.pending_uploads:
+                changed.add(self.pending_uploads.popleft())
+            while self.pending_deletions:
+                deleted.add(self.pending_deletions.popleft())
+
+            previous = {name: self.metadata.get(name, {}).get("checksum") for name in changed}  # single gets, no lock needed
+            local_files = self.scan_local_files(changed)
+            deleted = (deleted | changed) - set(local_files)  # includes files that came and went again
+
+            if not self.printer_files:
+                try:
+                    self.printer_files = dict(self.printer.getCardFiles())
+                except Exception:
+                    self.printer_files = {}
+            self.save_metadata_entries({filename: None for filename in deleted})
+            self.error_files.difference_update(deleted)  # a failed upload of a file that's gone can't be retried
+            if self.config["delete_remote"]:
+                to_delete = [filename for filename in deleted if filename in self.printer_files]
+                if to_delete:
+                    self.delete_on_printer(to_delete)
+
+            for filename, meta in local_files.items():
+                if filename not in self.printer_files or meta["checksum"] != previous.get(filename):
+                    self.syncing_files.add(filename)
+            self.update_status("synced")
+        if self.syncing_files:
+            self.upload_files()
+
+    def delete_on_printer(self, filenames):
+        # one batch of deletes for both sync paths. returns the names still on the card, and only those go in the
+        # error: removeCardFiles re-lists anything it couldn't confirm, and if the batch itself blew up the card is
+        # asked here before blaming every file
+        try:
+            failed = self.printer.removeCardFiles(filenames)  # one round trip for the lot
+        except Exception:
+            try:
+                on_card = dict(self.printer.getCardFiles())
+                failed = [filename for filename in filenames if filename in on_card]
+            except Exception:
+                failed = list(filenames)  # printer unreachable, nothing is known to be gone
+        for filename in filenames:
+            if filename not in failed:
+                self.printer_files.pop(filename, None)
+        if failed:
+            self.handle_error("Failed to delete on printer: " + ", ".join(f"'{filename}'" for filename in failed))
+        return failed
+
+    def full_sync_all(self):
+        if self.printing_paused or self.uploads_in_flight:
             return
         with self.sync_lock:
             self.update_status("syncing")
 
             # Step 1: Read local files metadata
+            while self.pending_uploads:
+                self.pending_uploads.popleft()  # the full scan below covers them
+            while self.pending_deletions:
+                self.pending_deletions.popleft()
             local_files = self.scan_local_files()
 
             # Step 2: Read printer files
@@ -270,21 +534,24 @@ class SyncAgent:
                 self.printer_files = dict(self.printer.getCardFiles())
             except Exception:
                 self.printer_files = {}
+            # same folder, same card and same delete setting as the last full pass that had nothing left to do,
+            # skip the diff. turning delete_remote on has to run the deletion step even if no file changed
+            fingerprint = hash((frozenset((name, meta["mtime_ns"], meta["size"]) for name, meta in local_files.items()),
+                                frozenset(self.printer_files.items()), self.config["delete_remote"]))
+            if fingerprint == self.last_sync_fingerprint and not self.syncing_files:
+                self.update_status("synced")
+                return
+            settled = True  # only a pass that changed nothing gets to skip the next one
             if (self.config["delete_remote"]):
                 # Step 3: Sync deletions - files on printer but not locally
-                to_delete = set(self.printer_files.keys()) - set(local_files.keys())
-                for filename in to_delete:
-                    try:
-                        self.printer.removeCardFile(filename)
-                        with self.metadata_lock:
-                            self.metadata.pop(filename, None)
-                    except Exception:
-                        self.handle_error(f"Failed to delete '{filename}' on printer")
+                to_delete = self.printer_files.keys() - local_files.keys()
+                if to_delete:
+                    settled = False
+                    failed = self.delete_on_printer(list(to_delete))
+                    self.save_metadata_entries({filename: None for filename in to_delete if filename not in failed})
 
-            # Step 4: Sync additions/modifications
+            # Step 4: Sync additions/modifications. scan_local_files only returns .ctb/.goo files
             for filename, meta in local_files.items():
-                if not filename.lower().endswith((".ctb", ".goo")):
-                    continue  # Skip non-CTB/GOO files
                 if filename not in self.printer_files:
                     # New file - upload
                     if filename not in self.syncing_files:
@@ -296,170 +563,260 @@ class SyncAgent:
                             self.syncing_files.add(filename)
 
             # Step 5: Purge metadata entries for deleted local files
-            local_set = set(local_files.keys())
-            with self.metadata_lock:
-                for filename in list(self.metadata.keys()):
-                    if filename not in local_set:
-                        self.metadata.pop(filename)
-
-            self.save_metadata()
+            with self.metadata_lock:  # held because this walks the whole dict
+                gone = self.metadata.keys() - local_files.keys()
+            if gone:
+                self.save_metadata_entries(dict.fromkeys(gone))  # one append for all of them
+            self.error_files.intersection_update(local_files)  # and forget failed uploads of files that are gone
+            self.last_sync_fingerprint = fingerprint if settled and not self.syncing_files else None
             self.update_status("synced")
-        if len(self.syncing_files) and self.current_uploading_file == "":
+        if self.syncing_files:
             self.upload_files()
 
-    def scan_local_files(self):
-        # Return dict: filename -> metadata dict {mtime, size, checksum (optional)}
+    def scan_local_files(self, names=None):
+        # Return dict: filename -> metadata dict {mtime_ns, size, ino, checksum (optional)}
+        # names limits the scan (and the stat calls) to those files, the rest of the snapshot is kept
         files_meta = {}
-        for entry in self.sync_folder.iterdir():    
-            if entry.suffix.lower() in (".ctb", ".goo"):
+        to_hash = []
+        updates = {}
+        with os.scandir(self.sync_folder) as it:  # one readdir, and each entry caches its own stat
+            entries = [entry for entry in it if is_slice_file(entry.name)
+                       and (names is None or entry.name in names)]
+        for entry in entries:
+            try:
+                stat = entry.stat()
+                mtime = stat.st_mtime_ns
+                size = stat.st_size
+                ino = entry.inode()  # DirEntry.stat() leaves st_ino at 0 on Windows
+                key = entry.name
+
+                meta = self.metadata.get(key, {})
+                checksum = meta.get("checksum")
+
+                # Only hash when the file's identity (size, mtime, inode) changed
+                need_hash = False
+                if (not checksum) or meta.get("mtime_ns") != mtime or meta.get("size") != size or meta.get("ino", ino) != ino:
+                    need_hash = True
+
+                files_meta[key] = {"mtime_ns": mtime, "size": size, "ino": ino, "checksum": checksum}
+                if need_hash:
+                    to_hash.append(entry.path)
+                elif "ino" not in meta:  # upgraded from schema 1, fill in the inode without rehashing
+                    updates[key] = dict(meta, ino=ino)
+            except Exception:
+                # Ignore unreadable files
+                pass
+
+        # hash the changed files side by side, hashlib and blake3 drop the GIL while they work
+        if to_hash:
+            def hash_one(path):
                 try:
-                    stat = entry.stat()
-                    mtime = stat.st_mtime
-                    size = stat.st_size
-                    key = entry.name
-
-                    meta = self.metadata.get(key, {})
-                    checksum = meta.get("checksum")
-
-                    # Check if hash needed
-                    need_hash = False
-                    if (not checksum) or meta.get("mtime") != mtime or meta.get("size") != size:
-                        need_hash = True
-
-                    if need_hash:
-                        checksum = self.compute_checksum(entry)
-                        with self.metadata_lock:
-                            self.metadata[key] = {
-                                "mtime": mtime,
-                                "size": size,
-                                "checksum": checksum,
-                            }
-                    files_meta[key] = {"mtime": mtime, "size": size, "checksum": checksum}
+                    return self.compute_checksum(path)
                 except Exception:
-                    # Ignore unreadable files
-                    pass
+                    return None
+            # capped at 4, past that the disk is the limit and blake3 already spreads each file over the cores
+            with ThreadPoolExecutor(max_workers=min(len(to_hash), os.cpu_count() or 1, 4)) as pool:
+                checksums = list(pool.map(hash_one, to_hash))
+            for path, checksum in zip(to_hash, checksums):
+                key = os.path.basename(path)
+                if checksum is None:
+                    files_meta.pop(key)  # unreadable, ignore it like above
+                    continue
+                files_meta[key]["checksum"] = checksum
+                updates[key] = dict(files_meta[key])
+        if updates:
+            self.save_metadata_entries(updates)
+        if names is None:
+            self.local_snapshot = dict(files_meta)
+        elif self.local_snapshot is not None:
+            snapshot = {name: meta for name, meta in self.local_snapshot.items() if name not in names}
+            snapshot.update(files_meta)
+            self.local_snapshot = snapshot
+        self.local_snapshot_version += 1
         return files_meta
 
+    def patch_snapshot(self, changed, gone):
+        # folds what the folder watcher saw into the last scan's listing, a stat per changed file instead of
+        # a rescan of the folder. checksums are left to the sync that follows
+        snapshot = self.local_snapshot
+        if snapshot is None:
+            return  # nothing to patch, the next refresh scans anyway
+        snapshot = dict(snapshot)
+        for path in gone:
+            snapshot.pop(os.path.basename(path), None)
+        for path in changed:
+            name = os.path.basename(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                snapshot.pop(name, None)  # already gone again
+                continue
+            old = snapshot.get(name, {})
+            same = old.get("mtime_ns") == stat.st_mtime_ns and old.get("size") == stat.st_size
+            snapshot[name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "ino": stat.st_ino,
+                              "checksum": old.get("checksum") if same else None}
+        self.local_snapshot = snapshot
+        self.local_snapshot_version += 1
+
     def compute_checksum(self, filepath):
-        sha256 = hashlib.sha256()
-        with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                sha256.update(chunk)
-        return sha256.hexdigest()
+        # always read, never mmap: a slicer truncating the file mid-hash would SIGBUS a mapping and take the
+        # whole app down, where a read just comes up short and the next scan hashes it again
+        with open(filepath, "rb", buffering=0) as f:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)  # let the kernel read ahead harder
+            if blake3 is not None:
+                # 8 MiB blocks are big enough for blake3 to spread each update over all cores
+                hasher = blake3.blake3(max_threads=blake3.blake3.AUTO)
+                buf = bytearray(8 << 20)
+            elif hasattr(hashlib, "file_digest"):
+                return hashlib.file_digest(f, "sha256").hexdigest()  # 3.11+, the read loop runs in C
+            else:
+                hasher = hashlib.sha256()
+                buf = bytearray(1 << 20)
+            view = memoryview(buf)
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                hasher.update(view[:n])
+        return hasher.hexdigest()
 
     def is_file_modified(self, filename, local_meta):
-        with self.metadata_lock:
-            stored_meta = self.metadata.get(filename)
+        stored_meta = self.metadata.get(filename)  # one dict get is atomic, writers swap whole entries in
         if not stored_meta:
             return True  # New file for metadata, consider modified
-        if local_meta["checksum"] != stored_meta.get("checksum"):
-            return True
-        if (Path(self.sync_folder) / filename).stat().st_mtime != stored_meta.get("mtime"):
-            return True
-        return False
+        if local_meta["mtime_ns"] == stored_meta.get("mtime_ns") and local_meta["size"] == stored_meta.get("size"):
+            return False  # unchanged on disk, the stored checksum still stands
+        # touched or resized, only the contents decide
+        return local_meta.get("checksum") != stored_meta.get("checksum")
 
     def upload_files(self):
+        # queue whatever is waiting to sync for the uploader thread, largest first so the long transfers
+        # start early. a name stays in queued_uploads until its upload is over, so it is never queued twice
+        for filename in list(self.syncing_files):
+            if filename in self.queued_uploads:
+                continue
+            try:
+                size = os.path.getsize(self.sync_folder / filename)
+            except OSError:
+                size = 0
+            self.queued_uploads.add(filename)
+            self.upload_queue.put((-size, filename))
+
+    def upload_loop(self):
+        # hands queued files to the pool, only as fast as it has free workers so the backlog keeps its size order
+        while True:
+            self.upload_slots.acquire()
+            _, filename = self.upload_queue.get()
+            if self.stop_event.is_set():
+                return
+            try:
+                self.upload_pool.submit(self.upload_queued, filename)
+            except RuntimeError:
+                return  # stop() shut the pool down between the check and here
 
-        def worker():
-            filesToSync = self.syncing_files.copy()
-            for filename in filesToSync:
-                if self.stop_event.is_set():
-                    return
-                path = Path(self.sync_folder) / filename
-                if not os.path.isfile(path): #in case file was deleted since being added to the list
-                    self.syncing_files.discard(filename)
-                    continue
-                try:
-                    # Check printing status before upload
-                    printCheck = self.printer.printingStatus()
-                    if printCheck.startswith("Printing"):
-                        # Defer upload
-                        self.printing_paused = True
-                        return
-                    if printCheck == "Timeout":
-                        return
-
-                    self.printing_paused = False
-                    self.update_status("syncing")
-                    
-                    stable_duration = 2.0  # seconds
-                    start = time.time()
-                    last_size = -1
-                    stable_start = None
-                    timeout = 240 # wait up to four minutes for filesize to stabilize
+    def upload_queued(self, filename):
+        try:
+            self.upload_file(filename)
+        finally:
+            self.queued_uploads.discard(filename)  # after upload_file dropped it from syncing_files
+            self.upload_slots.release()
 
-                    self.current_uploading_file = filename
+    def upload_file(self, filename):
+        if self.stop_event.is_set():
+            return
+        path = Path(self.sync_folder) / filename
+        if not os.path.isfile(path): #in case file was deleted since being added to the list
+            self.syncing_files.discard(filename)
+            return
+        try:
+            # Check printing status before upload
+            with self.upload_sem:
+                printCheck = self.printing_status()
+            if printCheck.startswith("Printing"):
+                # Defer upload
+                self.printing_paused = True
+                return
+            if printCheck == "Timeout":
+                return
 
-                    while time.time() - start < timeout and os.path.isfile(path):
-                        try:
-                            size = os.path.getsize(path)
-                        except (OSError, PermissionError):
-                            size = -1
-
-                        if size == last_size and size != -1:
-                            if stable_start is None:
-                                stable_start = time.time()
-                            elif time.time() - stable_start >= stable_duration:
-                                break  # file size stable long enough, assume done writing
-                        else:
-                            last_size = size
-                            stable_start = None
-                        if self.stop_event.is_set():
-                            return
-                        time.sleep(stable_duration/2)
-                    else:
-                        if not os.path.isfile(path):
-                            self.syncing_files.discard(filename) # ghost file
-                        self.current_uploading_file = ""
-                        continue
+            self.printing_paused = False
+            self.update_status("syncing")
+            
+            # wait until the slicer is done writing: a close (or rename into place) event where the
+            # platform reports one, otherwise half a second with no write to it
+            closed = self.event_handler.closed_event(filename)
+            stable_duration = 0.5  # seconds
+            timeout = 240 # wait up to four minutes for the writer to finish
+            if not self.event_handler.wait_until_quiet(path, stable_duration, timeout, self.stop_event):
+                if not os.path.isfile(path):
+                    self.syncing_files.discard(filename) # ghost file
+                return
+            closed.clear() # the next version of the file has to be closed again
 
-                    if self.ui:
-                        self.ui.root.after(0,self.ui.set_controls_enabled(False))
-                        self.ui.update_status_text(f"Uploading {filename}, 0/{os.stat(str(path)).st_size}")
-                        self.ui.root.after(0,self.ui.progress_var.set(0))
-                        self.ui.root.after(0,self.ui.bar_upload_print.pack())
-                        self.ui.root.after(0,self.ui.start_upload_progress())
-
-                    result = self.printer.uploadFile(str(path), filename)
-
-                    if "Error" in result or "Failed" in result or "No Response" in result:
-                        self.ui.update_status_text("Upload Failed!")
-                        self.handle_error(f"Upload error: {result}")
-                        self.error_files.add(filename)
-                    else:
-                        self.ui.update_status_text("Upload Complete!")
-                        # Update metadata on successful upload
-                        stat = path.stat()
-                        checksum = self.compute_checksum(path)
-                        with self.metadata_lock:
-                            self.metadata[filename] = {
-                                "mtime": stat.st_mtime,
-                                "size": stat.st_size,
-                                "checksum": checksum,
-                            }
-                        self.save_metadata()
-                        if filename in self.error_files:
-                            self.error_files.remove(filename)
-                        self.printer_files[filename] = (filename, stat.st_size)
-                except Exception as e:
-                    self.handle_error(f"Upload exception: {e}")
-                    self.ui.update_status_text("Upload Failed!")
-                finally:
-                    self.current_uploading_file = ""
-                    self.syncing_files.discard(filename)
-                    self.update_status("synced")
-                    if self.ui:
-                        self.ui.root.after(0, self.ui.progress_var.set(0))
-                        self.ui.root.after(0, self.ui.bar_upload_print.pack())
-                        self.ui.root.after(0, self.ui.set_controls_enabled(True))
-                        self.ui.root.after(0, self.ui.refresh_file_list())
-        threading.Thread(target=worker, daemon=True).start()
+            with self.upload_sem:
+                if self.stop_event.is_set():
+                    return  # quit while waiting for the other upload, don't start a new one
+                # only now is it on the wire. a file still waiting on its slicer must not hold off pings, deletes
+                # and other syncs, which all stand back while this set is non-empty
+                self.uploads_in_flight.add(filename)
+                self.current_uploading_file = filename
+                if self.ui:
+                    # hand the callable to Tk, calling it here would touch widgets from this thread
+                    self.ui.update_status_text(f"Uploading {filename}, 0/{os.stat(str(path)).st_size}")
+                    self.ui.root.after(0, self.ui.start_upload_progress)
+
+                hasher = blake3.blake3() if blake3 is not None else hashlib.sha256()  # CHECKSUM_ALGO
+                # stop_event aborts the transfer between batches, so quitting doesn't wait out a whole file
+                result = self.printer.uploadFile(str(path), filename, hasher, self.stop_event)
+                self.current_uploading_file = ""
+
+            if self.stop_event.is_set():
+                return  # cut short by quitting, not a failure. the next start sends it again
+            if "Error" in result or "Failed" in result or "No Response" in result:
+                self.ui.update_status_text("Upload Failed!")
+                self.handle_error(f"Upload error: {result}", filename)
+                self.error_files.add(filename)
+            else:
+                self.ui.update_status_text("Upload Complete!")
+                # Update metadata on successful upload
+                stat = path.stat()
+                checksum = hasher.hexdigest()  # hashed as it went out, no second read of the file
+                self.save_metadata_entry(filename, {
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "ino": stat.st_ino,
+                    "checksum": checksum,
+                })
+                if filename in self.error_files:
+                    self.error_files.remove(filename)
+                self.clear_error(filename)
+                self.last_sync_fingerprint = None
+                self.printer_files[filename] = str(stat.st_size)  # same form as the card listing, name -> size string
+        except Exception as e:
+            self.handle_error(f"Upload exception: {e}", filename)
+            self.ui.update_status_text("Upload Failed!")
+        finally:
+            if self.current_uploading_file == filename:
+                self.current_uploading_file = ""
+            self.syncing_files.discard(filename)
+            self.uploads_in_flight.discard(filename)
+            if not self.uploads_in_flight:
+                self.update_status("synced")
+            if self.ui:
+                self.ui.root.after(0, self.ui.finish_upload_progress)
 
-    def handle_error(self, message):
-        self.error_files.add(message)
+    def handle_error(self, message, key=None):
+        # key groups repeats of the same failure, e.g. the file name for upload errors
+        self.clear_error(key or message)
+        self.errors.append((key or message, message))
         self.update_status("error")
         self.show_balloon("Saturn Sync Agent - Error", message)
 
+    def clear_error(self, key):
+        for entry in [entry for entry in self.errors if entry[0] == key]:
+            self.errors.remove(entry)
+
     def show_balloon(self, title, msg):
         # Platform specific balloon notification via pystray
         if self.tray_icon:
@@ -469,37 +826,46 @@ class SyncAgent:
         if new_status == self.status:
             return
         self.status = new_status
-        if self.ui and self.current_uploading_file == "" and not self.printing_paused: # let the UI handle its own messages if it's uploading or printing
+        if self.ui and not self.uploads_in_flight and not self.printing_paused: # let the UI handle its own messages if it's uploading or printing
             self.ui.update_status_text(new_status)
         self.update_tray_icon(new_status)
         self.update_tray_tooltip()
 
     def update_tray_icon(self, new_status):
+        if self.ui:
+            self.ui.root.after(0, self.ui.set_icon, new_status)
         if self.tray_icon:
             icon_image = self.icon_images.get(new_status)
-            self.tray_icon.icon = icon_image
-            self.tray_icon._update_icon()
+            if icon_image is None or self.tray_icon.icon is icon_image:
+                return
+            self.tray_icon.icon = icon_image  # pystray refreshes the native icon itself when it's visible
 
     def update_tray_tooltip(self):
         if self.tray_icon:
-            tooltips = {
-                "offline": f"Saturn Sync Agent - Offline\nPrinter IP: {self.config['printer_ip']}",
-                "syncing": f"Saturn Sync Agent - Syncing\nFiles syncing: {len(self.syncing_files)}",
-                "synced": f"Saturn Sync Agent - Synced\nPrinter IP: {self.config['printer_ip']}",
-                "error": f"Saturn Sync Agent - Error\nPending errors: {len(self.error_files)}",
-                "printing": f"Saturn Sync Agent - Printing\n{self.current_printing_file}",
-            }
-            tooltip = tooltips.get(self.status, "Saturn Sync Agent")
-            self.tray_icon.title = tooltip
+            template = self.TOOLTIPS.get(self.status, "Saturn Sync Agent")
+            tooltip = template.format(ip=self.config['printer_ip'], syncing=len(self.syncing_files),
+                                      errors=len(self.errors), printing=self.current_printing_file)
+            if tooltip != self.tray_icon.title:  # pystray pushes every assignment to the native icon
+                self.tray_icon.title = tooltip
 
     def start(self):
         # Start folder watcher
-        self.observer.schedule(self.event_handler, str(self.sync_folder), recursive=False)
+        if sys.platform.startswith("linux"):
+            # have inotify report only finished writes, renames, creations and deletes instead of every event
+            try:
+                self.observer.schedule(self.event_handler, str(self.sync_folder), recursive=False,
+                                       event_filter=FolderChangeHandler.WATCHED_EVENTS)
+            except TypeError:  # watchdog older than 4.0 has no event_filter
+                self.observer.schedule(self.event_handler, str(self.sync_folder), recursive=False)
+        else:
+            self.observer.schedule(self.event_handler, str(self.sync_folder), recursive=False)
         self.observer.start()
 
         # Start main sync thread
         self.sync_thread = threading.Thread(target=self.run, daemon=True)
         self.sync_thread.start()
+        self.upload_thread = threading.Thread(target=self.upload_loop, daemon=True)
+        self.upload_thread.start()
 
         # Start tray icon
         self.setup_tray_icon()
@@ -509,16 +875,34 @@ class SyncAgent:
 
     def stop(self):
         self.stop_event.set()
+        self.wake()
+        self.upload_queue.put((float("-inf"), ""))  # unblock the uploader so it sees stop_event
+        # the pool's workers aren't daemons and would hold up exit. drop what hasn't started, the running
+        # upload sees stop_event and ends after its current batch
+        self.upload_pool.shutdown(wait=False, cancel_futures=True)
         self.observer.stop()
         self.observer.join()
 
         if self.tray_icon:
             self.tray_icon.stop()
         if self.ui:
+            # same for the UI's workers: a progress query still waiting out the printer timeout, or a folder scan,
+            # mustn't hold up exit. poll_progress and _start_scan check stop_event, so nothing new is submitted after this
+            self.ui._printer_executor.shutdown(wait=False, cancel_futures=True)
+            self.ui._scan_executor.shutdown(wait=False, cancel_futures=True)
             self.ui.root.quit()
 
-    def manual_sync(self):
+    def manual_sync(self, changed=None, deleted=None):
+        # with no paths this is a user asking for a full re-sync, the folder watcher passes what it saw
+        if changed is None and deleted is None:
+            self.full_sync_requested = True
+            self.last_sync_fingerprint = None  # asked for by the user, so do the whole diff
+        if changed:
+            self.pending_uploads.extend(os.path.basename(path) for path in changed)
+        if deleted:
+            self.pending_deletions.extend(os.path.basename(path) for path in deleted)
         self.manual_sync_requested = True
+        self.wake()
 
     def setup_tray_icon(self):
         menu = (
@@ -532,25 +916,135 @@ class SyncAgent:
 
     def show_ui(self, _=None):
         if self.ui:
-            self.ui.show_window()
+            self.ui.root.after(0, self.ui.show_window)  # called from the tray icon's thread
 
     def setup_ui(self):
         self.ui = SyncUI(self)
-        self.ui.run()
+        # Ctrl-C arrives while this thread sits in mainloop, still inside SyncAgent(). run the normal shutdown
+        # from there instead of letting a KeyboardInterrupt escape before main() could call stop()
+        signal.signal(signal.SIGINT, lambda signum, frame: self.ui.root.after(0, self.stop))
+        try:
+            self.ui.run()
+        finally:
+            # no mainloop left to run that after(), hand Ctrl-C back to main()'s KeyboardInterrupt handler
+            signal.signal(signal.SIGINT, signal.default_int_handler)
 
 class FolderChangeHandler(FileSystemEventHandler):
+    DEBOUNCE = 0.5  # seconds of quiet before a burst of events turns into one sync
+    MAX_BATCH = 5.0  # but a burst that never goes quiet still flushes this often
+
     def __init__(self, agent):
         self.agent = agent
+        self._timer = None
+        self._lock = threading.Lock()
+        self._paths = set()  # created or written since the last flush
+        self._gone = set()  # deleted or renamed away since the last flush
+        self._batch_start = None  # time.monotonic() of the first event since the last flush
+        self._closed = {}  # filename -> threading.Event, set once a writer has closed the file
+        self._changed_at = {}  # filename -> time.monotonic() of its last write event
+        self._changes = threading.Condition(self._lock)  # notified on every event, see wait_until_quiet
+
+    def closed_event(self, filename):
+        with self._lock:
+            return self._closed.setdefault(filename, threading.Event())
+
+    def wait_until_quiet(self, path, quiet, timeout, stop_event):
+        # True once the writer closed the file, or once it has gone `quiet` seconds with neither a write
+        # event nor a new mtime. sleeps on the condition in between, so a waiting file costs a stat per wake up
+        name = os.path.basename(path)
+        closed = self.closed_event(name)
+        deadline = time.monotonic() + timeout
+        last_mtime = since = None
+        with self._changes:
+            while not stop_event.is_set():
+                if closed.is_set():
+                    return True
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except OSError:
+                    return False
+                now = time.monotonic()
+                if mtime != last_mtime:
+                    last_mtime, since = mtime, now
+                idle = now - max(since, self._changed_at.get(name, since))
+                if idle >= quiet:
+                    return True
+                if now >= deadline:
+                    return False
+                self._changes.wait(min(quiet - idle, deadline - now))
+        return False
+
+    IGNORED_EVENTS = ("opened", "closed_no_write")  # reads, nothing changed
+    # what inotify is asked for. created has to stay: a file moved in from outside the folder is an unpaired
+    # IN_MOVED_TO, which watchdog reports as created rather than moved
+    WATCHED_EVENTS = [FileClosedEvent, FileCreatedEvent, FileMovedEvent, FileDeletedEvent]
 
     def on_any_event(self, event):
-        if event.is_directory:
+        if event.is_directory or event.event_type in self.IGNORED_EVENTS:
+            return
+        changed = gone = None
+        if event.event_type == "deleted":
+            gone = event.src_path
+        elif event.event_type == "moved":
+            gone = event.src_path
+            changed = getattr(event, "dest_path", "")  # renamed into place, e.g. a slicer's temp file
+        else:
+            changed = event.src_path
+        if changed and not is_slice_file(changed):
+            changed = None
+        if gone and not is_slice_file(gone):
+            gone = None
+        if not changed and not gone:
             return
-        if not event.src_path.lower().endswith((".ctb", ".goo")):
+        if event.event_type == "modified" and self._unchanged(changed):
             return
+        if changed and event.event_type in ("closed", "moved"):
+            self.closed_event(os.path.basename(changed)).set()  # the writer is done with it, see wait_until_quiet
+        # slicers fire a stream of create/modify events per file, restart the timer on each one
+        with self._lock:
+            if changed:
+                self._paths.add(changed)
+                self._changed_at[os.path.basename(changed)] = time.monotonic()
+            if gone:
+                self._gone.add(gone)
+                self._changed_at.pop(os.path.basename(gone), None)
+            self._changes.notify_all()
+            now = time.monotonic()
+            if self._batch_start is None:
+                self._batch_start = now
+            if self._timer:
+                self._timer.cancel()
+            delay = min(self.DEBOUNCE, max(0, self._batch_start + self.MAX_BATCH - now))
+            self._timer = threading.Timer(delay, self._flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _unchanged(self, path):
+        # attribute-only changes (atime, permissions) arrive as "modified" too. if size and mtime still match
+        # the last scan, the bytes didn't move and there is nothing to sync
+        snapshot = self.agent.local_snapshot
+        meta = snapshot.get(os.path.basename(path)) if snapshot else None
+        if not meta:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_size == meta["size"] and stat.st_mtime_ns == meta["mtime_ns"]
+
+    def _flush(self):
+        with self._lock:
+            paths = self._paths
+            gone = self._gone
+            self._paths = set()
+            self._gone = set()
+            self._timer = None
+            self._batch_start = None
         # Trigger manual sync due to folder change
+        self.agent.patch_snapshot(paths, gone)
         if self.agent.ui:
             self.agent.ui.root.after(0, self.agent.ui.refresh_file_list)
-        self.agent.manual_sync()
+        self.agent.manual_sync(paths, gone)
 
     
 class SyncUI:
@@ -559,11 +1053,15 @@ class SyncUI:
         "uploading": "↑",
         "missing": "!",
     }
+    BULK_ROWS = 200  # changed rows past which _patch_listbox unmaps the listbox while it works
+    UPLOAD_TEXT = "Uploading %s %d/%d kb"  # name, kb sent, kb total
 
     def __init__(self, agent):
         self.agent = agent
         self.root = tk.Tk()
-        set_window_icon(self.root, load_base_icon())
+        # one tk image per status, made once. switching the window icon is then just an iconphoto call
+        self._tk_icons = {status: ImageTk.PhotoImage(image) for status, image in self.agent.icon_images.items()}
+        self.set_icon(self.agent.status)
         self.root.title("Saturn Sync Agent")
         self.root.geometry("600x420")
         self.root.protocol("WM_DELETE_WINDOW", self.hide_window)
@@ -573,6 +1071,7 @@ class SyncUI:
         file_menu = tk.Menu(menubar, tearoff=0)
         file_menu.add_command(label="Open Sync Folder", command=self.open_folder)
         file_menu.add_command(label="Delete File", command=self.delete_selected_file)
+        file_menu.add_command(label="Verify Files", command=self.verify_files)
         file_menu.add_separator()
         file_menu.add_command(label="Close GUI", command=self.hide_window)
         file_menu.add_command(label="Exit", command=self.agent.stop)
@@ -631,7 +1130,7 @@ class SyncUI:
         btn_frame.pack(fill=tk.X, padx=10, pady=(0, 6))
 
         self.btn_print = tk.Button(btn_frame, text="Print Selected File", command=self.print_selected_file)
-        self.btn_refresh = tk.Button(btn_frame, text="Refresh File List", command=self.refresh_file_list)
+        self.btn_refresh = tk.Button(btn_frame, text="Refresh File List", command=lambda: self.refresh_file_list(True))
         self.btn_sync_now = tk.Button(btn_frame, text="Manual Sync Now", command=self.agent.manual_sync)
 
         self.btn_print.pack(side=tk.LEFT, padx=5)
@@ -650,21 +1149,49 @@ class SyncUI:
         self.bar_upload_print = ttk.Progressbar(bar_frame, orient="horizontal",
                                                 mode="determinate", length=400,
                                                 variable=self.progress_var, maximum=100)
-        self.bar_upload_print.pack(side=tk.RIGHT, padx=10)
+        self.bar_upload_print.pack(side=tk.RIGHT, padx=10)  # packed once and never hidden, progress only moves its value
 
         # internal: caches for display
         self._local_items = []   # list[str] filenames only, in listbox order
+        self._local_lines = []   # list[str] as rendered, with indicators
         self._remote_items = []  # list[str]
         self._local_status = {}  # filename -> "synced"|"uploading"|"missing"
 
+        # folder scans run here, off the Tk thread
+        self._scan_executor = ThreadPoolExecutor(max_workers=1)
+        self._printer_executor = ThreadPoolExecutor(max_workers=1)  # print progress queries, see poll_progress
+        self._scan_inflight = False
+        self._scan_again = False
+        self._refresh_soon = False  # see refresh_file_list
+        self._progress_shown = None  # (text, value) last put on the status bar by _show_progress
+        self._last_status = None  # see update_status_text
+        self._upload_progress = deque(maxlen=1)  # newest (filelength, remaining) from the printer, see on_upload_progress
+        self._upload_posted = False  # an _apply_upload_progress is already waiting on the Tk queue
+        self._upload_shown = None  # (file name, kb sent) last drawn by _apply_upload_progress
+        self._finalized = False  # the bar and controls are already back at rest, see _finalize_ui
+        self.agent.printer.progress_callback = self.on_upload_progress
+        self._refresh_pending = False
+
         self.refresh_file_list()
         self.root.withdraw()
 
+    def set_icon(self, status):
+        icon = self._tk_icons.get(status)
+        if icon is not None:
+            self.root.iconphoto(True, icon)
+
+    def _local_entries(self):
+        # filename -> os.DirEntry, from a single scandir. the entries cache their stat
+        with os.scandir(self.agent.sync_folder) as it:
+            return {f.name: f for f in it if is_slice_file(f.name) and f.is_file()}
+
     def _local_files(self):
-        sync_folder = self.agent.sync_folder
-        return sorted([f.name for f in sync_folder.iterdir() if f.is_file() and f.suffix.lower() in (".ctb", ".goo")])
+        entries = self.agent.local_snapshot  # the last scan's listing, kept current by the folder watcher
+        if entries is None:
+            entries = self._local_entries()
+        return sorted(entries)
 
-    def _is_synced(self, filename):
+    def _is_synced(self, filename, entry=None): # entry: a DirEntry, or the file's dict from the agent's scan snapshot
         if filename in getattr(self.agent, "syncing_files", set()):
             return False
         try:
@@ -672,13 +1199,18 @@ class SyncUI:
                 if filename not in self.agent.printer_files:
                     return False
             meta = self.agent.metadata.get(filename)
-            p = (self.agent.sync_folder / filename)
-            if not meta or not p.exists():
-                return False
-            stat = p.stat()
-            if stat.st_size != meta.get("size"):
+            if not meta:
                 return False
-            return self.agent.compute_checksum(p) == meta.get("checksum")
+            if isinstance(entry, dict):
+                size, mtime_ns = entry["size"], entry["mtime_ns"]
+            else:
+                if entry is not None:
+                    stat = entry.stat()
+                else:
+                    stat = (self.agent.sync_folder / filename).stat()  # a missing file raises, which reads as not synced
+                size, mtime_ns = stat.st_size, stat.st_mtime_ns
+            # size and mtime are enough here, contents only get hashed by the sync scan or Verify Files
+            return size == meta.get("size") and mtime_ns == meta.get("mtime_ns")
         except Exception:
             return False
 
@@ -718,7 +1250,7 @@ class SyncUI:
                 return
             try:
                 (self.agent.sync_folder / fname_local).unlink(missing_ok=True)
-                self.refresh_file_list()
+                self.refresh_file_list(True)
             except Exception as e:
                 messagebox.showerror("Delete Local Failed", str(e))
                 return
@@ -753,37 +1285,64 @@ class SyncUI:
                 if messagebox.askyesno("Delete local copy?", f"'{fname_remote}' still exists locally. Delete local copy?"):
                     try:
                         (local_path).unlink(missing_ok=True)
-                        self.refresh_file_list()
+                        self.refresh_file_list(True)
                     except Exception as e:
                         messagebox.showerror("Delete Local Failed", str(e))
                         return
                 else:
                     try:
                         self.agent.syncing_files.add(fname_remote)
-                        self.agent.manual_sync_requested = True
+                        self.agent.manual_sync()  # sets the flag and wakes the sync thread
                     except Exception as e:
                         messagebox.showerror("Re-upload Failed", str(e))
 
         self.refresh_file_list()
 
+    def verify_files(self):
+        # deep check: rehash every local file and compare against the stored checksum
+        def matches(fname):
+            try:
+                return self.agent.compute_checksum(self.agent.sync_folder / fname) == self.agent.metadata[fname].get("checksum")
+            except Exception:
+                return False
+        names = [fname for fname in self._local_files() if self.agent.metadata.get(fname)]
+        mismatched = []
+        if names:
+            # side by side like the sync scan's hashing, with the same cap
+            with ThreadPoolExecutor(max_workers=min(len(names), os.cpu_count() or 1, 4)) as pool:
+                mismatched = [fname for fname, ok in zip(names, pool.map(matches, names)) if not ok]
+        if not mismatched:
+            messagebox.showinfo("Verify Files", "All files match their recorded checksums.")
+            return
+        for fname in mismatched:
+            self.agent.save_metadata_entry(fname, None) # stale, the next scan records the real checksum
+        self.agent.syncing_files.update(mismatched)
+        self.agent.manual_sync()
+        self.refresh_file_list()
+        messagebox.showwarning("Verify Files", "These files changed and will be uploaded again:\n" + "\n".join(mismatched))
+
     def open_folder(self):
         path = str(self.agent.sync_folder)
         try:
             if os.name == "nt":
                 os.startfile(path)
             elif sys.platform == "darwin":
-                os.system(f'open "{path}"')
+                # no shell to quote for, and detached so the file manager outlives us and keeps its chatter off our console
+                subprocess.Popen(["open", path], start_new_session=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             else:
-                os.system(f'xdg-open "{path}"')
+                subprocess.Popen(["xdg-open", path], start_new_session=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         except Exception:
             messagebox.showinfo("Folder", path)
 
     def update_status_text(self, new_status):
         if self.root:
+            # a message that is already showing schedules nothing
+            if new_status == self._last_status:
+                return
+            self._last_status = new_status
             def _update():
                 self.text_status['state'] = 'normal'
-                self.text_status.delete("1.0", tk.END)
-                self.text_status.insert("1.0", new_status)
+                self.text_status.replace("1.0", tk.END, new_status)
                 self.text_status['state'] = 'disabled'
             self.root.after(0, _update)
 
@@ -801,37 +1360,104 @@ class SyncUI:
         if self.agent.printing_paused:
             self.start_upload_progress()
 
-    def refresh_file_list(self):
-        local = self._local_files()
-        remote_set = {}
-        if self.agent.printer_files:
-            remote_set = (dict)(self.agent.printer_files)
+    def refresh_file_list(self, rescan=False):
+        # calls within 50 ms of each other share one scan. the scan runs on the worker and renders back on the
+        # Tk thread, a refresh asked for mid-scan runs once it's done.
+        # the last sync's folder snapshot is used unless rescan says the folder changed since
+        if rescan:
+            self.agent.local_snapshot = None
+        if self._refresh_soon:
+            return
+        self._refresh_soon = True
+        self.root.after(50, self._start_scan)
+
+    def _start_scan(self):
+        self._refresh_soon = False
+        if self.agent.stop_event.is_set():
+            return  # shutting down, the scan executor is already closed
+        if self._scan_inflight:
+            self._scan_again = True
+            return
+        self._scan_inflight = True
+        future = self._scan_executor.submit(self._scan_file_list)
+        future.add_done_callback(lambda f: self.root.after(0, self._apply_file_list, f))
+
+    def request_refresh(self):
+        # trailing-edge refresh, so a burst of upload completions costs one scan instead of one each
+        if self._refresh_pending:
+            return
+        self._refresh_pending = True
+        self.root.after(250, self._do_refresh_if_pending)
+
+    def _do_refresh_if_pending(self):
+        if self._refresh_pending:
+            self._refresh_pending = False
+            self.refresh_file_list()
+
+    def _scan_file_list(self):
+        entries = self.agent.local_snapshot
+        if entries is None:
+            entries = self._local_entries()
+        local = sorted(entries)
+        remote_items = sorted(self.agent.printer_files)  # only the names are shown, no need to copy the dict first
         # Build local statuses
         status_map = {}
+        syncing = set(self.agent.syncing_files)  # one copy, the upload thread keeps changing the original
         for fname in local:
-            if fname in getattr(self.agent, "syncing_files", set()):
+            if fname in syncing:
                 status_map[fname] = "uploading"
-            elif self._is_synced(fname):
+            elif self._is_synced(fname, entries[fname]):
                 status_map[fname] = "synced"
             else:
                 status_map[fname] = "missing"
-        
-        # Render local (indicators left, aligned)
-        self.local_list.delete(0, tk.END)
-        self._local_items = local
-        for fname in local:
-            ind = self.INDICATORS[status_map[fname]]
-            line = f"[{ind}] {fname}"
-            self.local_list.insert(tk.END, line)
+        return local, remote_items, status_map
+
+    def _apply_file_list(self, future):
+        self._scan_inflight = False
+        if self._scan_again:
+            self._scan_again = False
+            self._start_scan()
+        try:
+            local, remote_items, status_map = future.result()
+        except Exception:
+            return # folder unreadable right now, keep showing the last good list
+
+        # Render local (indicators left, aligned). only the rows that changed are touched, see _patch_listbox.
+        # the usual refresh changes nothing, so that case skips formatting the lines at all
+        if local != self._local_items or status_map != self._local_status:
+            indicators = self.INDICATORS
+            lines = [f"[{indicators[status_map[fname]]}] {fname}" for fname in local]
+            if lines != self._local_lines:
+                self._patch_listbox(self.local_list, self._local_lines, lines)
+                self._local_lines = lines
+            self._local_items = local
 
         # Render remote (no indicators)
-        self.remote_list.delete(0, tk.END)
-        self._remote_items = sorted(remote_set)
-        for fname in self._remote_items:
-            self.remote_list.insert(tk.END, fname)
+        if remote_items != self._remote_items:
+            self._patch_listbox(self.remote_list, self._remote_items, remote_items)
+            self._remote_items = remote_items
 
         self._local_status = status_map
 
+    def _patch_listbox(self, listbox, old, new):
+        # turns the rows in old into new with a delete/insert per changed run, so selection and scroll position
+        # survive a refresh. walked back to front so the indices still to come stay valid
+        opcodes = [op for op in difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes() if op[0] != "equal"]
+        # a big rewrite goes in with the widget unmapped, so tk lays it out once instead of after every run
+        bulk = sum(max(i2 - i1, j2 - j1) for _, i1, i2, j1, j2 in opcodes) > self.BULK_ROWS
+        if bulk:
+            info = listbox.pack_info()
+            listbox.pack_forget()
+        try:
+            for _, i1, i2, j1, j2 in reversed(opcodes):
+                if i2 > i1:
+                    listbox.delete(i1, i2 - 1)
+                if j2 > j1:
+                    listbox.insert(i1, *new[j1:j2])
+        finally:
+            if bulk:
+                listbox.pack(**info)
+
     def _selection_local(self):
         sel = self.local_list.curselection()
         if not sel:
@@ -862,21 +1488,42 @@ class SyncUI:
         if not messagebox.askyesno("Confirm Print", f"Send print command for '{fname}'?"):
             return
 
+        # talk to the printer on a worker thread, the answer comes back through the queue
+        self.btn_print.config(state=tk.DISABLED)
+        results = Queue()
+
+        def worker():
+            try:
+                status = self.agent.printing_status(ttl=0)
+                if status == "Printing":
+                    results.put(("busy", None))
+                    return
+                results.put(("sent", self.agent.printer.startPrinting(fname)))
+                self.agent.invalidate_printing_status()
+            except Exception as e:
+                results.put(("failed", e))
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(100, self._poll_print_result, results, fname)
+
+    def _poll_print_result(self, results, fname):
         try:
-            status = self.agent.printer.printingStatus()
-            if status == "Printing":
-                messagebox.showwarning("Printer Busy", "Printer is currently printing.")
-                return
-            result = self.agent.printer.startPrinting(fname)
-            if "Error" in result:
-                messagebox.showerror("Print Error", f"Failed to start print:\n{result}")
-            else:
-                messagebox.showinfo("Print Started", f"'{fname}' started printing.")
-                self.agent.current_printing_file = fname
-                self.agent.printing_paused = True
-                self.start_upload_progress()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to send print command:\n{e}")
+            outcome, value = results.get_nowait()
+        except Empty:
+            self.root.after(100, self._poll_print_result, results, fname)
+            return
+        self.btn_print.config(state=tk.NORMAL)
+        if outcome == "busy":
+            messagebox.showwarning("Printer Busy", "Printer is currently printing.")
+        elif outcome == "failed":
+            messagebox.showerror("Error", f"Failed to send print command:\n{value}")
+        elif "Error" in value:
+            messagebox.showerror("Print Error", f"Failed to start print:\n{value}")
+        else:
+            messagebox.showinfo("Print Started", f"'{fname}' started printing.")
+            self.agent.current_printing_file = fname
+            self.agent.printing_paused = True
+            self.start_upload_progress()
 
     def change_sync_folder(self):
         folder = filedialog.askdirectory(initialdir=self.agent.sync_folder)
@@ -889,7 +1536,7 @@ class SyncUI:
     def change_printer_ip(self):
         ip = tk.simpledialog.askstring("Printer IP", "Enter printer IP address:", initialvalue=self.agent.config["printer_ip"])
         if ip:
-            self.agent.printer.ip = ip
+            self.agent.printer.setIp(ip)
             self.agent.config["printer_ip"] = ip
             self.agent.save_config()
             messagebox.showinfo("Printer IP Changed", f"Printer IP changed to: {ip}")
@@ -899,6 +1546,7 @@ class SyncUI:
                                          initialvalue=self.agent.ping_interval // 60, minvalue=0)
         if val is not None:
             self.agent.ping_interval = val * 60
+            self.agent.wake()
             self.agent.config["ping_interval_minutes"] = val
             self.agent.save_config()
             messagebox.showinfo("Ping Interval Changed", f"Ping interval set to {val} minutes.")
@@ -923,81 +1571,146 @@ class SyncUI:
         self.btn_sync_now.config(state=state)
 
     def start_upload_progress(self):
-        
-        self.root.after(0, lambda: self.set_controls_enabled(False))
-        self.root.after(0, lambda: self.progress_var.set(0))
-        self.root.after(0, self.bar_upload_print.pack)
+        # this and the progress callbacks below only run on the Tk thread, so they touch the widgets directly
+        self._progress_shown = None
+        self._upload_shown = None
+        self._finalized = False
+        self.set_controls_enabled(False)
+        self.progress_var.set(0)
         self.poll_progress()
 
+    def finish_upload_progress(self):
+        # one Tk callback for everything an upload puts back when it ends, however it ended
+        self._finalize_ui()
+        self.request_refresh()
+
     def fuzzy_percent(self, p: float) -> float:
         # do some horrific math to get a (marginally) more accurate print progress meter
-        if p < 95:
-            return p * 80 / 95
-        else:
-            return 80 + (p - 95) * 4
+        return p * FUZZY_SCALE if p < 95 else 80 + (p - 95) * 4
 
     def poll_progress(self):
         if (self.agent.stop_event.is_set()):
             return
+        if (self.agent.printing_paused):
+            # the printer round trips run on a worker, the answer is drawn back here on the Tk thread
+            future = self._printer_executor.submit(self._fetch_print_progress)
+            future.add_done_callback(lambda f: self.root.after(0, self._apply_print_progress, f))
+            return
+        self._progress_next()  # uploads push their own progress, see on_upload_progress
+
+    def on_upload_progress(self, filelength, remaining):
+        # the printer calls this from the upload thread after every acknowledged batch. only the newest numbers
+        # are kept, and at most one Tk callback waits for them however fast the batches come in. one tuple in a
+        # deque, so the two numbers always belong together, and its atomic append/pop need no lock.
+        # append before looking at the flag: _apply clears it before popping, so nothing gets lost in between
+        self._upload_progress.append((filelength, remaining))
+        if not self._upload_posted:
+            self._upload_posted = True
+            self.root.after_idle(self._apply_upload_progress)  # once Tk has caught up, so a redraw fits in between
+
+    def _apply_upload_progress(self):
+        self._upload_posted = False
         try:
-            if (self.agent.printing_paused):
-                progressString = self.agent.printer.printingStatus()
-                if progressString != "Not Printing" and progressString != "Timeout":
-                    filenameshort = self.agent.current_printing_file
-                    if filenameshort == "":
-                        printSize = (float)(progressString.split("/")[1])
-                        try:
-                            remote_files = self.agent.printer.getCardFiles()
-                        except:
-                            remote_files = []
-                        for filename, fileSize in remote_files:
-                            if (float)(fileSize) == printSize:
-                                filenameshort = filename
-                                self.agent.current_printing_file = filename
-                                break
-                    if len(filenameshort) > 18:
-                        filenameshort = filenameshort[:15]
-                        filenameshort += "..."
-                    progressString=progressString.split()[4] # we only want the x/y portion
-                    progress=self.fuzzy_percent((float)(progressString.split("/")[0]) / (float)(progressString.split("/")[1]) * 100)
-                    self.update_status_text(f"Printing {filenameshort}: {round(progress, 2)}%")
-                    self.root.after(0, lambda: self.set_controls_enabled(False))
-                    self.root.after(0, lambda: self.progress_var.set(progress))
-                elif progressString != "Timeout":
-                    self.update_status_text("Printing Complete!")
-                    self.agent.printing_paused = False
-                    self.agent.current_printing_file = ""
-            else:
-                filelength = self.agent.printer.filelength
-                remaining = self.agent.printer.remaining
-                if remaining > 0:
-                    progress = 1 - remaining / filelength
-                    filenameshort = self.agent.current_uploading_file
-                    if len(filenameshort) > 18:
-                        filenameshort = filenameshort[:15]
-                        filenameshort += "..."
-                    self.root.after(0, lambda: self.set_controls_enabled(False))
-                    self.root.after(0, lambda: self.progress_var.set(int(progress * 100)))
-                    self.update_status_text(f"Uploading {filenameshort} {int((filelength - remaining)/1024)}/{int(filelength/1024)} kb")
-                else:
-                    self.update_status_text("Upload Complete!")
-        except Exception:
-            self.root.after(0, lambda: self.set_controls_enabled(True))
-            self.root.after(0, lambda: self.progress_var.set(0))
-            self.root.after(0, self.bar_upload_print.pack)
-        finally:
-            if self.agent.printing_paused or self.agent.current_uploading_file != "":
-                self.root.after(3000, self.poll_progress)
+            filelength, remaining = self._upload_progress.pop()
+        except IndexError:
+            return  # a later post already drew it
+        if remaining <= 0 or filelength <= 0 or not self.agent.uploads_in_flight:
+            return  # done, upload_file reports how it went
+        # the text counts whole kb, so batches inside the same kb change nothing on screen
+        name = self.agent.current_uploading_file
+        kb_done = (filelength - remaining) >> 10
+        if (name, kb_done) == self._upload_shown:
+            return
+        self._upload_shown = (name, kb_done)
+        percent = (filelength - remaining) * 100 // filelength  # exact on ints, no float rounding at the edges
+        self._show_progress(self.UPLOAD_TEXT % (short_name(name), kb_done, filelength >> 10), percent)
+
+    def _fetch_print_progress(self):
+        # runs on the printer worker: M27, plus a lookup by size to name the job if we didn't start it
+        progressString = self.agent.printing_status(ttl=0)  # the progress bar wants it fresh, and it refreshes the cache
+        filename = self.agent.current_printing_file
+        done = total = None
+        match = PROGRESS_RE.search(progressString)
+        if match:
+            done, total = int(match.group(1)), int(match.group(2))
+        if filename == "" and total is not None and progressString != "Not Printing" and progressString != "Timeout":
+            filename = self._card_file_of_size(list(self.agent.printer_files.items()), total)  # the sync's listing
+            if filename == "":
+                try:
+                    filename = self._card_file_of_size(self.agent.printer.getCardFiles(), total)  # not in it, ask the card
+                except:
+                    pass
+        return progressString, filename, done, total
+
+    def _card_file_of_size(self, remote_files, size):
+        # remote_files is (name, size) pairs, the size as the card lists it, e.g. [("a.ctb", "5000")]
+        for remote_name, fileSize in remote_files:
+            try:
+                if (float)(fileSize) == size:
+                    return remote_name
+            except (TypeError, ValueError):
+                continue  # not a size, can't be the one printing
+        return ""
+
+    def _apply_print_progress(self, future):
+        if future.exception() is not None:  # the query itself failed, e.g. the socket went away
+            self._finalize_ui()
+            self._progress_next()
+            return
+        progressString, filenameshort, done, total = future.result()
+        if progressString == "Timeout":
+            pass  # no answer this time, ask again on the next poll
+        elif progressString == "Not Printing":
+            self.update_status_text("Printing Complete!")
+            self.agent.printing_paused = False
+            self.agent.current_printing_file = ""
+        else:
+            self.agent.current_printing_file = filenameshort
+            if total:
+                progress=self.fuzzy_percent(done / total * 100)
+                self._show_progress(f"Printing {short_name(filenameshort)}: {round(progress, 2)}%", progress)
             else:
-                self.root.after(0, lambda: self.set_controls_enabled(True))
-                self.root.after(0, lambda: self.progress_var.set(0))
-                self.root.after(0, self.bar_upload_print.pack)
-                self.root.after(0, self.refresh_file_list)
+                self._finalize_ui()  # printing, but the reply had no byte counts to show
+        self._progress_next()
+
+    def _show_progress(self, text, value):
+        # each widget only changes when its own part does, so a long layer or a stalled transfer costs no Tk
+        # calls, and a new kb on the same percent only touches the text
+        if self._progress_shown is None:  # first update since the bar was put away
+            self._finalized = False
+            self.set_controls_enabled(False)
+            shown_text = shown_value = None
+        else:
+            shown_text, shown_value = self._progress_shown
+        self._progress_shown = (text, value)
+        if text != shown_text:
+            self.update_status_text(text)
+        if value != shown_value:
+            self.progress_var.set(value)
+
+    def _finalize_ui(self):
+        # every upload end and idle poll lands here, only the first since the bar was last used does any Tk work
+        self._progress_shown = None
+        if self._finalized:
+            return
+        self._finalized = True
+        self.set_controls_enabled(True)
+        self.progress_var.set(0)
+
+    def _progress_next(self):
+        # only a print gets polled. an upload pushes its progress and finish_upload_progress puts the bar away
+        if self.agent.printing_paused:
+            self.root.after(3000, self.poll_progress)
+        elif not self.agent.uploads_in_flight:
+            self._finalize_ui()
+            self.request_refresh()  # shares the refresh the finished upload already asked for
 
 def main():
     agent = SyncAgent()
     try:
-        agent.sync_thread.join()
+        # joined in slices, an untimed join doesn't let Ctrl-C through on Windows until the thread ends
+        while agent.sync_thread.is_alive():
+            agent.sync_thread.join(timeout=0.5)
     except KeyboardInterrupt:
         agent.stop()
 
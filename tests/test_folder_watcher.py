@@ -0,0 +1,56 @@
+import os
+import shutil
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip("watchdog")
+pytest.importorskip("PIL")
+os.environ.setdefault("PYSTRAY_BACKEND", "dummy")  # no tray needed, and no display to put one on
+pytest.importorskip("pystray")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from watchdog.observers import Observer
+
+from saturn_sync_full import FolderChangeHandler
+
+
+class FakeAgent:
+    local_snapshot = None
+    ui = None
+
+    def __init__(self):
+        self.synced = threading.Event()
+        self.changed = set()
+
+    def patch_snapshot(self, changed, gone):
+        pass
+
+    def manual_sync(self, changed=None, deleted=None):
+        self.changed.update(os.path.basename(path) for path in changed or ())
+        self.synced.set()
+
+
+def test_file_moved_in_from_outside_triggers_sync(tmp_path):
+    watched = tmp_path / "watched"
+    outside = tmp_path / "outside"
+    watched.mkdir()
+    outside.mkdir()
+    (outside / "model.ctb").write_bytes(b"x" * 4096)
+
+    agent = FakeAgent()
+    observer = Observer()
+    try:
+        observer.schedule(FolderChangeHandler(agent), str(watched), recursive=False,
+                          event_filter=FolderChangeHandler.WATCHED_EVENTS)
+    except TypeError:  # watchdog older than 4.0 has no event_filter
+        observer.schedule(FolderChangeHandler(agent), str(watched), recursive=False)
+    observer.start()
+    try:
+        shutil.move(str(outside / "model.ctb"), str(watched / "model.ctb"))
+        assert agent.synced.wait(5)
+    finally:
+        observer.stop()
+        observer.join()
+    assert agent.changed == {"model.ctb"}
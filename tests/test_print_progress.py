@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("watchdog")
+pytest.importorskip("PIL")
+os.environ.setdefault("PYSTRAY_BACKEND", "dummy")  # no tray needed, and no display to put one on
+pytest.importorskip("pystray")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from saturn_sync_full import SyncUI
+
+
+class FakePrinter:
+    def __init__(self, card_files):
+        self.card_files = card_files
+
+    def getCardFiles(self):
+        return self.card_files
+
+
+class FakeAgent:
+    current_printing_file = ""
+
+    def __init__(self, printer_files, card_files=()):
+        self.printer_files = printer_files
+        self.printer = FakePrinter(list(card_files))
+
+    def printing_status(self, ttl=None):
+        return "SD printing byte 1000/5000"
+
+
+def fetch(agent):
+    ui = object.__new__(SyncUI)  # no Tk, _fetch_print_progress only needs the agent
+    ui.agent = agent
+    return ui._fetch_print_progress()
+
+
+def test_print_job_named_from_sync_listing():
+    # as the sync stores it: name -> size string from getCardFiles, plus one recorded by upload_file
+    agent = FakeAgent({"Some File.goo": "300", "a.ctb": "5000", "up.ctb": "12"},
+                      card_files=[("other.ctb", "5000")])
+    assert fetch(agent) == ("SD printing byte 1000/5000", "a.ctb", 1000, 5000)
+
+
+def test_print_job_falls_back_to_card_listing():
+    agent = FakeAgent({"Some File.goo": "300"}, card_files=[("Some File.goo", "300"), ("b.ctb", "5000")])
+    assert fetch(agent)[1] == "b.ctb"
+
+
+def test_card_file_of_size_ignores_unreadable_sizes():
+    assert SyncUI._card_file_of_size(None, [("x.ctb", None), ("y.ctb", "big"), ("z.ctb", "5000")], 5000) == "z.ctb"
+    assert SyncUI._card_file_of_size(None, {"x.ctb": "12"}.items(), 5000) == ""